@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'SoftDesk.settings')
+os.environ.setdefault('SOFTDESK_ASYNC_VIEWS', '1')
 
-application = get_asgi_application()
+# what get_asgi_application() does, with the handler streaming the exports from a thread
+django.setup(set_prefix=False)
+
+from SoftDesk.async_views import StreamingASGIHandler  # noqa: E402 (needs the apps to be loaded)
+
+application = StreamingASGIHandler()
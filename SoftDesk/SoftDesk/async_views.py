@@ -0,0 +1,90 @@
+"""
+Bridge serving the synchronous DRF views from the ASGI event loop
+"""
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connections
+
+from SoftDesk import settings
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_END_OF_STREAM = object()
+
+# its own threads rather than the default executor of the event loop, sized after the number of CPUs
+_read_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_READ_CONCURRENCY, thread_name_prefix='softdesk-read')
+
+
+def _run_read(view, request, *args, **kwargs):
+    """
+    Runs the view in a worker thread, rendering included,
+    and releases the worker's database connection the way Django does at the end of a request
+    """
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def asgi_view(view):
+    """
+    Under ASGI, Django runs every synchronous view in one shared thread, one request at a time.
+    The wrapped view runs the reads in a pool of ASYNC_READ_CONCURRENCY threads instead, the others waiting for a thread,
+    and leaves the writes in the shared thread, where they keep being serialized as SQLite takes a single writer.
+    Returns the view unchanged when the project is not served through ASGI.
+    """
+    if not settings.ASYNC_VIEWS:
+        return view
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await sync_to_async(_run_read, thread_sensitive=False,
+                                   executor=_read_executor)(view, request, *args, **kwargs)
+
+    return wrapper
+
+
+def _close_stream(response):
+    """
+    Closes the response and the database connection of the thread that streamed it
+    """
+    try:
+        response.close()
+    finally:
+        connections.close_all()
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Django 3.2 iterates the streaming responses on the event loop, where their queries are not allowed.
+    Each one is iterated, then closed, in a thread of its own instead:
+    its queries keep one connection, in the transaction the export reads from,
+    which the shared thread of the synchronous views must not see.
+    """
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        headers = [(header.encode('ascii'), value.encode('latin1')) for header, value in response.items()]
+        headers += [(b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+                    for cookie in response.cookies.values()]
+        await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='softdesk-stream') as stream_thread:
+            next_part = sync_to_async(next, thread_sensitive=False, executor=stream_thread)
+            parts = iter(response)
+            try:
+                while True:
+                    part = await next_part(parts, _END_OF_STREAM)
+                    if part is _END_OF_STREAM:
+                        break
+                    for chunk, _ in self.chunk_bytes(part):
+                        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                await send({'type': 'http.response.body'})
+            finally:
+                await sync_to_async(_close_stream, thread_sensitive=False, executor=stream_thread)(response)
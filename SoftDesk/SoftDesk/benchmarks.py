@@ -0,0 +1,55 @@
+"""
+Helpers of the benchmark commands of the SoftDesk project:
+timings, query plans, and a transaction always rolled back so that the seeded rows never stay in the database
+"""
+import itertools
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+from django.db import connection, transaction
+
+_plan_numbers = itertools.count()
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """
+    Runs the block in a transaction that is rolled back at its end, schema changes included
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def timings(function: Callable, repeat: int) -> dict:
+    """
+    Calls the function repeat times, returns the median and 95th percentile durations in milliseconds
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {'median_ms': durations[len(durations) // 2],
+            'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))]}
+
+
+def query_plan(queryset) -> str:
+    """
+    The SQLite plan of the queryset on one line.
+    Each EXPLAIN is a new statement: sqlite3 caches the prepared statements by their text,
+    and one prepared before a schema change would still show the former plan.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql} /* plan {next(_plan_numbers)} */', params)
+        return ' | '.join(row[-1] for row in cursor.fetchall())
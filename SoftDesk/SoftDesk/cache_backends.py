@@ -0,0 +1,97 @@
+"""
+Cache backends of the SoftDesk project
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+from django.core.files.move import file_move_safe
+
+
+class LockingFileBasedCache(FileBasedCache):
+    """
+    File based cache whose add() and incr() are atomic across the processes sharing the directory,
+    thanks to a fixed set of lock files the keys are spread over.
+    incr() also keeps the expiry of the key instead of resetting it to the default timeout.
+    When MAX_ENTRIES is reached, the expired entries are deleted first:
+    random entries are only culled if the cache is still full of live ones.
+    """
+    lock_stripes = 64
+    lock_suffix = '.lock'
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._locked(self._key_to_file(key, version)):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        fname = self._key_to_file(key, version)
+        with self._locked(fname):
+            try:
+                with open(fname, 'rb') as f:
+                    expiry = pickle.load(f)
+                    if expiry is not None and expiry < time.time():
+                        raise FileNotFoundError(fname)
+                    value = pickle.loads(zlib.decompress(f.read())) + delta
+            except FileNotFoundError:
+                raise ValueError(f"Key '{key}' not found")
+            self._replace(fname, expiry, value)
+        return value
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        live = len([fname for fname in filelist if not self._delete_if_expired(fname)])
+        if live >= self._max_entries:
+            super()._cull()
+
+    def _delete_if_expired(self, fname):
+        """
+        Deletes the entry if it is expired, unless its stripe is locked: it is being written then
+        """
+        with self._locked(fname, blocking=False) as acquired:
+            if not acquired:
+                return False
+            try:
+                with open(fname, 'rb') as f:
+                    return self._is_expired(f)
+            except FileNotFoundError:
+                return True
+
+    def _replace(self, fname, expiry, value):
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        renamed = False
+        try:
+            with open(fd, 'wb') as f:
+                f.write(pickle.dumps(expiry, self.pickle_protocol))
+                f.write(zlib.compress(pickle.dumps(value, self.pickle_protocol)))
+            file_move_safe(tmp_path, fname, allow_overwrite=True)
+            renamed = True
+        finally:
+            if not renamed:
+                os.remove(tmp_path)
+
+    @contextmanager
+    def _locked(self, fname, blocking=True):
+        """
+        Holds the lock of the key's stripe; without blocking, yields whether it was acquired
+        (the culling of an add() holding a stripe must not wait for another one)
+        """
+        self._createdir()  # Cache dir can be deleted at any time.
+        stripe = int(hashlib.md5(fname.encode()).hexdigest(), 16) % self.lock_stripes
+        with open(os.path.join(self._dir, f'{stripe}{self.lock_suffix}'), 'ab') as lock_file:
+            acquired = locks.lock(lock_file, locks.LOCK_EX if blocking else locks.LOCK_EX | locks.LOCK_NB)
+            if not (acquired or blocking):
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                locks.unlock(lock_file)
@@ -0,0 +1,31 @@
+"""
+SQLite backend tuned for concurrent requests:
+the pragmas of the database settings are applied to every new connection,
+and persistent connections are checked before being reused
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for pragma, value in self.settings_dict.get('PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        return conn
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        """
+        Called at the start and at the end of every request:
+        a persistent connection that no longer answers is closed, and reopened on its next use
+        """
+        super().close_if_unusable_or_obsolete()
+        if self.connection is not None and self.settings_dict.get('CONN_HEALTH_CHECKS') and not self.is_usable():
+            self.close()
@@ -0,0 +1,39 @@
+"""
+Database router sending the reads of the replica-enabled requests to the read replicas
+"""
+import random
+from contextvars import ContextVar
+
+from SoftDesk import settings
+
+PRIMARY = 'default'
+
+# set by ReadReplicaMiddleware for the requests allowed to read from the replicas
+replica_reads = ContextVar('replica_reads', default=False)
+
+
+def reads_from_replica() -> bool:
+    return replica_reads.get() and bool(settings.REPLICA_DATABASES)
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads go to a random replica while the current request allows it, everything else goes to the primary.
+    The first write of a request sends its following reads back to the primary,
+    so that the request reads its own writes.
+    """
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return random.choice(settings.REPLICA_DATABASES)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        replica_reads.set(False)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # the replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
@@ -0,0 +1,114 @@
+"""
+Logging handlers keeping the log writes off the request thread
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats a record as a single JSON line
+    """
+    def format(self, record) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BatchingQueueHandler(QueueHandler):
+    """
+    Puts the records in a bounded queue on the calling thread,
+    a background thread formats them and writes them by batches
+    to the given file (or to stderr if no filename is given).
+
+    When the queue is full, the record is dropped (overflow='drop', counted and reported in the log)
+    or the calling thread waits for room (overflow='block').
+    """
+    overflow_policies = ('drop', 'block')
+
+    def __init__(self, filename=None, max_queue_size=10000, batch_size=100, overflow='drop'):
+        if overflow not in self.overflow_policies:
+            raise ValueError(f'overflow must be one of {self.overflow_policies}')
+        super().__init__(queue.Queue(maxsize=max_queue_size))
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()  # incremented by the logging threads, reset by the writer
+        self.target = logging.FileHandler(filename) if filename else logging.StreamHandler(sys.stderr)
+        self._writer = threading.Thread(target=self._write_batches, name='log-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        The message is not merged with its arguments here:
+        formatting is left to the writer thread
+        """
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+    def close(self):
+        if self._writer.is_alive():
+            self.queue.put(None)
+            self._writer.join()
+        self.target.close()
+        super().close()
+
+    def _write_batches(self):
+        stream_lock = self.target.lock
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            with self._dropped_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                batch.append(self._record(logging.WARNING, '%s log records dropped: logging queue full', dropped))
+            lines = [self._format(record) for record in batch if record is not None]
+            with stream_lock:
+                self.target.stream.write(''.join(f'{line}{self.target.terminator}' for line in lines))
+                self.target.flush()
+            if stopping:
+                return
+
+    @staticmethod
+    def _record(level, msg, *args) -> logging.LogRecord:
+        """
+        Record of the handler itself, formatted like the others
+        """
+        return logging.LogRecord(__name__, level, __file__, 0, msg, args, None)
+
+    def _format(self, record) -> str:
+        try:
+            return self.target.format(record)
+        except Exception:
+            return self.target.format(self._record(logging.ERROR, 'Unformattable log record: %r %r',
+                                                   record.msg, record.args))
@@ -0,0 +1,106 @@
+"""
+Middlewares of the SoftDesk project
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from SoftDesk import settings
+from SoftDesk.db_routers import replica_reads
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def primary_pin_key(user_id) -> str:
+    return f'primary_pin:{int(user_id)}'
+
+
+def pin_to_primary(user_id) -> None:
+    cache.set(primary_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user_id) -> bool:
+    return bool(cache.get(primary_pin_key(user_id)))
+
+
+class ReadReplicaMiddleware:
+    """
+    Lets the reads of a request go to the replicas when its view allows it (use_read_replica = True)
+    and the client did not write recently.
+    After a write, the client is pinned to the primary for REPLICA_PIN_SECONDS,
+    long enough for the replicas to catch up, so that it reads its own writes:
+    an authenticated user is pinned in the shared cache (checked by ReadReplicaViewMixin once the view
+    authenticated them, as the API clients send tokens and usually no cookies), any client through a cookie.
+    It never blocks: under ASGI it stays on the event loop, where a synchronous middleware would make Django
+    run the whole request, view included, in its single shared thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # marks the instance as a coroutine function for Django, as MiddlewareMixin does
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+            self.process_view = self._async_process_view
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        replica_reads.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica_reads.set(False)
+        return self.pin_writer(request, response)
+
+    async def __acall__(self, request):
+        replica_reads.set(False)
+        try:
+            response = await self.get_response(request)
+        finally:
+            replica_reads.set(False)
+        if request.method in READ_METHODS:
+            return response
+        # the pin is written to the cache, and a session user is loaded from the database
+        return await sync_to_async(self.pin_writer, thread_sensitive=False)(request, response)
+
+    @staticmethod
+    def pin_writer(request, response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            # the user authenticated by the view, DRF sets it on the Django request as well
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+            response.set_cookie(settings.REPLICA_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    @staticmethod
+    def allow_replica_reads(request, view_func):
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in READ_METHODS and getattr(view_class, 'use_read_replica', False)
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES):
+            replica_reads.set(True)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.allow_replica_reads(request, view_func)
+
+    async def _async_process_view(self, request, view_func, view_args, view_kwargs):
+        # a coroutine, so that Django does not run it in its shared thread and the flag is set in the request's context
+        self.allow_replica_reads(request, view_func)
+
+
+class ReadReplicaViewMixin:
+    """
+    Lets ReadReplicaMiddleware send the reads of the view to the replicas,
+    unless the user authenticated by the view wrote recently
+    """
+    use_read_replica = True
+
+    def initial(self, request, *args, **kwargs):
+        # before the permission checks, which may read as well
+        if replica_reads.get() and request.user.is_authenticated and is_pinned_to_primary(request.user.pk):
+            replica_reads.set(False)
+        super().initial(request, *args, **kwargs)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 import environment_variables
 import datetime
@@ -49,27 +50,39 @@ REST_FRAMEWORK = {
     # Use Django's standard `django.contrib.auth` permissions,
     # or allow read-only access for unauthenticated users.
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+        # reads the user from the token claims,
+        # 'rest_framework_jwt.authentication.JSONWebTokenAuthentication' reads it from the database
+        'users.authentication.StatelessJSONWebTokenAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # same output as 'rest_framework.renderers.JSONRenderer', written by orjson for the lists if installed
+        'SoftDesk.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'SoftDesk.throttling.AnonSlidingWindowThrottle',
+        'SoftDesk.throttling.ScopedSlidingWindowThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/day',
-        'user': '1000/day'
+        'user': '1000/day',
+        'projects': '1000/day',
+        'users': '1000/day',
+        'login': '10/minute',  # per username and client IP
                  },
     'DEFAULT_PAGINATION_CLASS':
-        'rest_framework.pagination.LimitOffsetPagination',
+        'projects.pagination.KeysetCursorPagination',
     'PAGE_SIZE': 10
 }
 
+# upper bound for the "page_size" query parameter of the list endpoints
+MAX_PAGE_SIZE = 100
+
+# rows per INSERT of the bulk endpoints
+BULK_BATCH_SIZE = 500
+
 JWT_AUTH = {
 
     'JWT_VERIFY': True,
@@ -79,18 +92,32 @@ JWT_AUTH = {
     'JWT_AUTH_HEADER_PREFIX': 'Bearer',  # override, default = JWT
 }
 
+# in-process cache of the full users behind the tokens, when more than their id and username is needed
+JWT_USER_CACHE_TTL = 30  # seconds
+JWT_USER_CACHE_SIZE = 1000
+
+# the handlers only queue the records, a background thread per handler writes them by batches
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'SoftDesk.log_handlers.JSONFormatter',
+        },
+    },
     'handlers': {
         'console': {
             'level': 'INFO',
-            'class': 'logging.StreamHandler',
+            'class': 'SoftDesk.log_handlers.BatchingQueueHandler',
         },
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'SoftDesk.log_handlers.BatchingQueueHandler',
             'filename': environment_variables.apps_logs_filename,
+            'formatter': 'json',
+            'max_queue_size': 10000,
+            'batch_size': 100,
+            'overflow': 'drop',  # or 'block' to never lose a record
         },
     },
     'loggers': {
@@ -120,6 +147,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'SoftDesk.middleware.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'SoftDesk.urls'
@@ -148,13 +176,97 @@ WSGI_APPLICATION = 'SoftDesk.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # 'django.db.backends.sqlite3' applying the PRAGMAS below to each connection
+        'ENGINE': 'SoftDesk.db_backends.sqlite3',
         'NAME': BASE_DIR / environment_variables.db_filename,
+        'OPTIONS': {
+            'timeout': 20,  # seconds a writer waits for the lock before "database is locked"
+        },
+        'PRAGMAS': {
+            'journal_mode': 'WAL',  # readers no longer block the writer, nor the writer the readers
+            'synchronous': 'NORMAL',  # durable at each WAL checkpoint instead of each commit
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,  # KiB
+            'temp_store': 'MEMORY',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# optional read replicas of the database: "db_replica_filenames" list in environment_variables.py
+REPLICA_DATABASES = []
+for index, replica_filename in enumerate(getattr(environment_variables, 'db_replica_filenames', [])):
+    REPLICA_DATABASES.append(f'replica_{index}')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / replica_filename,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['SoftDesk.db_routers.PrimaryReplicaRouter']
+# seconds the reads of a client stay on the primary after it wrote, while the replicas catch up
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+# Cache shared by all the worker processes of the host
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'SoftDesk.cache_backends.LockingFileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        # one file per entry: the throttle counters (2 per client and scope), the memberships and the pages.
+        # Once full, the expired entries are deleted first; the default of 300 entries
+        # made the random culls drop live throttle counters
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'CULL_FREQUENCY': 4,
+        },
     }
 }
 
+# seconds a (user, project) -> role entry stays in the membership cache
+MEMBERSHIP_CACHE_TIMEOUT = 300
+# set by asgi.py: the read endpoints run in a bounded pool of threads instead of Django's single sync thread
+ASYNC_VIEWS = os.environ.get('SOFTDESK_ASYNC_VIEWS') == '1'
+ASYNC_READ_CONCURRENCY = 8
+
+# issues read per database round trip by the export
+EXPORT_CHUNK_SIZE = 500
+
+# bytes of rendered issue / comment list pages kept in memory by each process
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# /projects/<id>/stats/ reads the issue counts from the summary table maintained by SQLite triggers
+PROJECT_STATS_FROM_SUMMARY = True
+
+# days the change feed (/projects/<id>/changes/) is kept by "manage.py compact_changes",
+# a client that did not sync for longer lists the project again
+CHANGE_LOG_RETENTION_DAYS = 30
+
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Password hashing
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+PASSWORD_HASHERS = [
+    'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# work factor of the PBKDF2 hasher, passwords are rehashed at login when it changes
+PASSWORD_HASHER_ITERATIONS = 260000
+
+# password checks of the login run in a pool of LOGIN_VERIFY_WORKERS threads,
+# a login waiting more than LOGIN_VERIFY_TIMEOUT seconds for one of them is answered 503
+LOGIN_VERIFY_WORKERS = 4
+LOGIN_VERIFY_TIMEOUT = 2
+
+# seconds an unknown username is remembered by the login
+LOGIN_UNKNOWN_USERNAME_TIMEOUT = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
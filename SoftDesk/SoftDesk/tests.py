@@ -0,0 +1,106 @@
+"""
+Tests of the project-wide modules of SoftDesk
+"""
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase, skipUnless
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from SoftDesk.cache_backends import LockingFileBasedCache
+from SoftDesk.log_handlers import BatchingQueueHandler, JSONFormatter
+from SoftDesk.throttling import ScopedSlidingWindowThrottle, SlidingWindowRateThrottle
+
+
+class BatchingQueueHandlerTests(TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        self.addCleanup(os.remove, self.filename)
+
+    def test_dropped_records_are_reported_as_json(self):
+        handler = BatchingQueueHandler(self.filename, max_queue_size=1)
+        handler.setFormatter(JSONFormatter())
+        logger = logging.getLogger('softdesk.tests.log_handlers')
+        # the writer holds the queued records while the file is locked, the queue fills up
+        with handler.target.lock:
+            for index in range(5):
+                handler.handle(logger.makeRecord(logger.name, logging.INFO, __file__, 0, 'record %s', (index,), None))
+        handler.close()
+
+        with open(self.filename) as log_file:
+            entries = [json.loads(line) for line in log_file]
+        dropped = [entry for entry in entries if 'dropped' in entry['message']]
+        self.assertEqual(len(dropped), 1)
+        self.assertEqual(dropped[0]['level'], 'WARNING')
+        dropped_count = int(dropped[0]['message'].split()[0])
+        self.assertEqual(len(entries) - 1 + dropped_count, 5)
+
+
+class ClientThrottle(SlidingWindowRateThrottle):
+    rate = '3/min'
+
+    def get_cache_key(self, request, view):
+        return 'throttle_client'
+
+
+def _allow_requests(cache_dir: str, requests: int):
+    """ Runs in a child process """
+    throttle = ClientThrottle()
+    throttle.cache, throttle.num_requests = LockingFileBasedCache(cache_dir, {}), 10 ** 6
+    for _ in range(requests):
+        throttle.allow_request(None, None)
+
+
+class SlidingWindowThrottleTests(TestCase):
+    def setUp(self):
+        self.cache = LocMemCache('throttle-tests', {})
+        self.cache.clear()
+        self.now = 600.0  # start of a window
+
+    def throttle(self, throttle_class=ClientThrottle):
+        throttle = throttle_class()
+        throttle.cache, throttle.timer = self.cache, lambda: self.now
+        return throttle
+
+    def test_previous_window_weighted(self):
+        self.assertEqual([self.throttle().allow_request(None, None) for _ in range(4)], [True, True, True, False])
+        self.now += 60  # the 3 requests of the previous window still fully count
+        self.assertFalse(self.throttle().allow_request(None, None))
+        self.now += 1
+        self.assertTrue(self.throttle().allow_request(None, None))
+        throttle = self.throttle()
+        self.assertFalse(throttle.allow_request(None, None))
+        self.assertAlmostEqual(throttle.wait(), 19)  # until the previous window weighs less than 2
+        self.now += 20
+        self.assertTrue(self.throttle().allow_request(None, None))
+
+    def test_scopes_counted_apart(self):
+        request = SimpleNamespace(user=SimpleNamespace(is_authenticated=True, pk=1))
+        projects_view, users_view = SimpleNamespace(throttle_scope='projects'), SimpleNamespace(throttle_scope='users')
+        throttles = [self.throttle(ScopedSlidingWindowThrottle) for _ in range(2)]
+        self.assertTrue(throttles[0].allow_request(request, projects_view))
+        self.assertTrue(throttles[1].allow_request(request, users_view))
+        self.assertNotEqual(throttles[0].key, throttles[1].key)
+        self.assertEqual((throttles[0].current_count, throttles[1].current_count), (0, 0))
+
+    @skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+    def test_counts_shared_across_processes(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        processes = [multiprocessing.get_context('fork').Process(target=_allow_requests, args=(cache_dir, 50))
+                     for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        throttle = ClientThrottle()
+        throttle.cache, throttle.num_requests = LockingFileBasedCache(cache_dir, {}), 10 ** 6
+        throttle.allow_request(None, None)
+        self.assertEqual(throttle.current_count + throttle.previous_count, 200)
@@ -0,0 +1,82 @@
+"""
+Throttles of the SoftDesk project, sharing their counters through the default cache
+"""
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Approximates a sliding window with the counters of the current and of the previous fixed windows:
+    the previous count is weighted by the part of it still inside the sliding window.
+    Each client costs two integers whatever the rate, instead of a list of request timestamps,
+    and the counters are updated with atomic cache operations.
+    """
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        self.elapsed_ratio = elapsed / self.duration
+        current_key, previous_key = f'{self.key}:{int(window)}', f'{self.key}:{int(window) - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        self.current_count, self.previous_count = counts.get(current_key, 0), counts.get(previous_key, 0)
+
+        if self.previous_count * (1 - self.elapsed_ratio) + self.current_count >= self.num_requests:
+            return self.throttle_failure()
+        # a window is still read as the previous one during the next window
+        if not self.cache.add(current_key, 1, self.duration * 2):
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                self.cache.add(current_key, 1, self.duration * 2)
+        return True
+
+    def wait(self):
+        """
+        Seconds until the estimated count goes back under the limit
+        """
+        remaining = self.duration * (1 - self.elapsed_ratio)
+        if self.current_count >= self.num_requests or not self.previous_count:
+            return remaining
+        ratio_needed = 1 - (self.num_requests - self.current_count) / self.previous_count
+        return max(0.0, min(remaining, (ratio_needed - self.elapsed_ratio) * self.duration))
+
+
+class AnonSlidingWindowThrottle(SlidingWindowRateThrottle):
+    """
+    Limits the requests of anonymous clients per IP address
+    """
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class ScopedSlidingWindowThrottle(SlidingWindowRateThrottle):
+    """
+    Limits the requests of authenticated users per user and per view.throttle_scope,
+    views without throttle_scope sharing the 'user' scope
+    """
+    scope_attr = 'throttle_scope'
+    default_scope = 'user'
+
+    def __init__(self):
+        # the rate depends on the view, it is set by allow_request
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, self.default_scope)
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': request.user.pk}
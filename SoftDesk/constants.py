@@ -8,6 +8,14 @@ CONTRIBUTOR_ROLES = [('Creator', 'Creator'), ('Manager', 'Manager'), ('Author',
 ISSUE_TAGS = [('Bug', 'Bug'), ('Feature', 'Feature'), ('Task', 'Task')]
 ISSUE_PRIORITIES = [('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High')]
 ISSUE_STATUSES = [('Todo', 'Todo'), ('Handled', 'Handled'), ('Closed',  'Closed')]
+CHANGE_OBJECT_TYPES = [('project', 'project'), ('contributor', 'contributor'), ('issue', 'issue'),
+                       ('comment', 'comment')]
+CHANGE_ACTIONS = [('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted')]
+
+# ordinal of each issue priority, stored alongside it so that issues are sorted by urgency
+ISSUE_PRIORITY_RANKS = {'Low': 1, 'Medium': 2, 'High': 3}
+# issues in any other status count as open
+ISSUE_CLOSED_STATUS = 'Closed'
 
 # permission constants
 PROJECT_ADMIN = ['Manager', 'Creator']
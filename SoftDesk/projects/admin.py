@@ -1,7 +1,22 @@
 from django.contrib import admin
 from .models import Project, Contributor, Issue, Comment
 
-admin.site.register(Project)
-admin.site.register(Contributor)
-admin.site.register(Issue)
-admin.site.register(Comment)
+
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_select_related = ('author',)
+
+
+@admin.register(Contributor)
+class ContributorAdmin(admin.ModelAdmin):
+    list_select_related = ('user', 'project__author')
+
+
+@admin.register(Issue)
+class IssueAdmin(admin.ModelAdmin):
+    list_select_related = ('author', 'project')
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_select_related = ('author', 'issue')
@@ -0,0 +1,18 @@
+"""
+API exceptions of the projects app
+"""
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class ProjectDeleted(APIException):
+    """
+    The project was deleted, at the given sequence number of the change feed
+    """
+    status_code = status.HTTP_410_GONE
+    default_code = 'project_deleted'
+
+    def __init__(self, project_id, deleted_seq: int):
+        super().__init__(f'Project #{project_id} was deleted')
+        # the sequence number stays a number, APIException would turn it into an error string
+        self.detail = {'detail': self.detail, 'last_seq': deleted_seq}
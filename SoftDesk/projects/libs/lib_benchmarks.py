@@ -0,0 +1,126 @@
+"""
+Functions lib for the benchmarks of projects app: a large project seeded in the current transaction,
+and the hot queries of the API with the indexes serving them
+"""
+import random
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from constants import ISSUE_TAGS, ISSUE_STATUSES, ISSUE_PRIORITY_RANKS
+from projects.libs import lib_projects
+from projects.models import Contributor, Project, Issue, Comment
+from projects.serializers import IssueSerializer
+from users.models import CustomUser
+
+WORDS = ('login', 'crash', 'timeout', 'upload', 'export', 'render', 'cache', 'token', 'layout', 'payment',
+         'search', 'mobile', 'report', 'backup', 'locale', 'sync', 'email', 'invoice', 'chart', 'widget')
+SEED_BATCH_SIZE = 10000
+
+
+def seed_users(number: int) -> list[int]:
+    CustomUser.objects.bulk_create([CustomUser(username=f'benchmark-{index}', password='!', first_name='bench',
+                                               last_name='mark', email=f'benchmark-{index}@softdesk.io')
+                                    for index in range(number)])
+    return list(CustomUser.objects.filter(username__startswith='benchmark-').order_by('id')
+                .values_list('id', flat=True))
+
+
+def seed_project(issues: int, users: int = 100, comments_per_issue: int = 0, seed: int = 0) -> int:
+    """
+    Creates a project with its contributors, issues and comments, returns its ID.
+    The issues spread over the statuses, priorities, tags, authors, assignees and over a year of creation,
+    their text is made of WORDS for the search.
+    The rows are inserted by batches of raw INSERTs, the triggers of the summary and search tables included.
+    """
+    rng = random.Random(seed)
+    user_ids = seed_users(users)
+    project = Project.objects.create(title='benchmark', description='seeded project', type='Back-End',
+                                     author_id=user_ids[0])
+    Contributor.objects.bulk_create([Contributor(project=project, user_id=user_id,
+                                                 role='Creator' if index == 0 else 'Author')
+                                     for index, user_id in enumerate(user_ids)])
+
+    adapt = connection.ops.adapt_datetimefield_value
+    start, seconds = timezone.now() - timedelta(days=365), 365 * 24 * 3600
+    priorities = list(ISSUE_PRIORITY_RANKS.items())
+    issue_columns = ('title', 'description', 'tag', 'priority', 'priority_rank', 'project_id', 'status', 'author_id',
+                     'assignee_id', 'created_time', 'updated_time', 'comment_count', 'last_activity_at')
+    comment_columns = ('description', 'author_id', 'issue_id', 'created_time', 'updated_time')
+    with connection.cursor() as cursor:
+        for offset in range(0, issues, SEED_BATCH_SIZE):
+            rows = []
+            for index in range(offset, min(issues, offset + SEED_BATCH_SIZE)):
+                created = adapt(start + timedelta(seconds=seconds * index // issues))
+                priority, priority_rank = rng.choice(priorities)
+                rows.append((f'{rng.choice(WORDS)} {rng.choice(WORDS)} #{index}',
+                             ' '.join(rng.choices(WORDS, k=12)), rng.choice(ISSUE_TAGS)[0], priority, priority_rank,
+                             project.id, rng.choice(ISSUE_STATUSES)[0], rng.choice(user_ids), rng.choice(user_ids),
+                             created, created, comments_per_issue, created))
+            cursor.executemany(f"INSERT INTO {Issue._meta.db_table} ({', '.join(issue_columns)}) "
+                               f"VALUES ({', '.join(['%s'] * len(issue_columns))})", rows)
+        # the comments of an issue repeat its description, by its assignee
+        for _ in range(comments_per_issue):
+            cursor.execute(f"INSERT INTO {Comment._meta.db_table} ({', '.join(comment_columns)}) "
+                           f"SELECT description, assignee_id, id, created_time, created_time "
+                           f"FROM {Issue._meta.db_table} WHERE project_id = %s", [project.id])
+    return project.id
+
+
+def hot_queries(project_id: int) -> dict:
+    """
+    The queries run by most requests, by name, with what their plan should search
+    """
+    project = Project.objects.get(pk=project_id)
+    contributor = Contributor.objects.filter(project=project_id).exclude(user=project.author_id).first()
+    issue = Issue.objects.filter(project=project_id).order_by('-id').first()
+    comment = Comment.objects.filter(issue__project=project_id).order_by('-id').first()
+    queries = {
+        'contributor role (project, user)': (
+            Contributor.objects.filter(project=project_id, user=contributor.user_id).values_list('role'),
+            'sqlite_autoindex_projects_contributor_1'),
+        'project manager (project, role)': (
+            Contributor.objects.filter(project=project_id, role='Manager').values_list('id'),
+            'contributor_project_role_idx'),
+        'registered role (user, role)': (
+            Contributor.objects.filter(user=contributor.user_id, role='Author').values_list('id'),
+            'contributor_user_role_idx'),
+        'identical project (title, description, type)': (
+            Project.objects.filter(title=project.title, description=project.description, type=project.type),
+            'project_identity_idx'),
+        'issue (project, id)': (Issue.objects.filter(project=project_id, id=issue.id), 'PRIMARY KEY'),
+        'issue page (project, created_time, id)': (
+            Issue.objects.filter(project=project_id).order_by('created_time', 'id')[:10], 'issue_project_page_idx'),
+    }
+    if comment is not None:
+        queries['comment (issue, id)'] = (Comment.objects.filter(issue=comment.issue_id, id=comment.id),
+                                          'PRIMARY KEY')
+    return queries
+
+
+def issue_list_filters(project_id: int) -> dict:
+    """
+    A value of each filter of the issue list, taken from an issue of the project, by filter name
+    """
+    issue = Issue.objects.filter(project=project_id).order_by('id')[Issue.objects.filter(project=project_id)
+                                                                     .count() // 2]
+    return {
+        'none': {},
+        'status': {'status': issue.status},
+        'priority': {'priority': issue.priority},
+        'tag': {'tag': issue.tag},
+        'assignee': {'assignee': issue.assignee_id},
+        'author': {'author': issue.author_id},
+        'created range': {'created_after': issue.created_time,
+                          'created_before': issue.created_time + timedelta(days=30)},
+    }
+
+
+def issue_page(project_id: int, filters: dict, ordering: str, page_size: int):
+    """
+    The query of the first page of the issue list, as the view and its cursor pagination run it
+    """
+    ordering = lib_projects.ISSUE_ORDERINGS[ordering]
+    queryset = lib_projects.filter_issues(Issue.objects.filter(project=project_id), filters)
+    return IssueSerializer.values_queryset(queryset, ordering).order_by(*ordering)[:page_size + 1]
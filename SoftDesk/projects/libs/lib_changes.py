@@ -0,0 +1,109 @@
+"""
+Functions lib for the change feed of projects app: the writes on a project are logged in the same transaction,
+so that a client syncs its copy by reading what changed since the last sequence number it read
+"""
+from datetime import timedelta
+from typing import Optional
+
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from SoftDesk import settings
+from projects.models import ChangeLogEntry
+
+CREATED, UPDATED, DELETED = 'created', 'updated', 'deleted'
+
+
+def log_changes(project_id, object_type: str, action: str, object_ids, issue_id=None) -> None:
+    ChangeLogEntry.objects.bulk_create([ChangeLogEntry(project_id=project_id, object_type=object_type,
+                                                       object_id=object_id, issue_id=issue_id, action=action)
+                                        for object_id in object_ids],
+                                       batch_size=settings.BULK_BATCH_SIZE)
+
+
+def log_change(project_id, object_type: str, action: str, object_id, issue_id=None) -> None:
+    ChangeLogEntry.objects.create(project_id=project_id, object_type=object_type, object_id=object_id,
+                                  issue_id=issue_id, action=action)
+
+
+def last_sequence() -> int:
+    return ChangeLogEntry.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def deletion_sequence(project_id) -> Optional[int]:
+    """
+    Sequence number of the deletion of the project, None if it was not deleted (or the deletion was compacted)
+    """
+    return (ChangeLogEntry.objects.filter(project_id=project_id, object_type='project', object_id=project_id,
+                                          action=DELETED)
+            .values_list('id', flat=True).first())
+
+
+def is_compacted(since: int) -> bool:
+    """
+    Whether changes after the sequence number may have been compacted away.
+    Compaction deletes the oldest entries and always keeps the last one,
+    so the smallest sequence number left tells how far it went.
+    """
+    first = ChangeLogEntry.objects.aggregate(first=Min('id'))['first']
+    return first is not None and since < first - 1
+
+
+def project_changes(project_id, since: int, limit: int) -> tuple[list[dict], int, bool]:
+    """
+    Reads the next changes of the project after the sequence number,
+    and keeps only the last one of each object: the client only needs its current state.
+    An object keeps the place of its first change, so that an issue still comes before its new comments.
+    Returns the changes, the sequence number to read from next time, and whether more changes follow.
+    """
+    entries = list(ChangeLogEntry.objects.filter(project_id=project_id, id__gt=since).order_by('id')
+                   .values('id', 'object_type', 'object_id', 'issue_id', 'action')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    changes = {}
+    for entry in entries:
+        key = (entry['object_type'], entry['object_id'])
+        # an object created within the read changes is new to the client whatever happened to it next
+        created = entry['action'] == CREATED or (key in changes and changes[key]['action'] == CREATED)
+        changes[key] = {
+            'seq': entry['id'],
+            'type': entry['object_type'],
+            'id': entry['object_id'],
+            'issue': entry['issue_id'],
+            'action': CREATED if created and entry['action'] != DELETED else entry['action'],
+        }
+    return list(changes.values()), entries[-1]['id'] if entries else since, has_more
+
+
+def embed_data(changes: list[dict], serializer_classes: dict) -> list[dict]:
+    """
+    Adds the current representation of the created and updated objects, with one query per object type.
+    An object deleted meanwhile has none, its deletion comes later in the feed.
+    """
+    for object_type, serializer_class in serializer_classes.items():
+        object_ids = [change['id'] for change in changes
+                      if change['type'] == object_type and change['action'] != DELETED]
+        if not object_ids:
+            continue
+        rows = serializer_class.values_data(serializer_class.values_queryset(
+            serializer_class.Meta.model.objects.filter(id__in=object_ids)))
+        data = {row['id']: row for row in rows}
+        for change in changes:
+            if change['type'] == object_type and change['action'] != DELETED:
+                change['data'] = data.get(change['id'])
+    for change in changes:
+        change.setdefault('data', None)
+    return changes
+
+
+def compact_changes(days: Optional[int] = None) -> int:
+    """
+    Deletes the changes older than the retention, but the very last one, returns the number of deleted changes
+    """
+    days = settings.CHANGE_LOG_RETENTION_DAYS if days is None else days
+    cutoff = (ChangeLogEntry.objects.filter(created_time__lt=timezone.now() - timedelta(days=days))
+              .aggregate(cutoff=Max('id'))['cutoff'])
+    if cutoff is None:
+        return 0
+    deleted, _ = ChangeLogEntry.objects.filter(id__lte=min(cutoff, last_sequence() - 1)).delete()
+    return deleted
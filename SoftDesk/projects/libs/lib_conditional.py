@@ -0,0 +1,70 @@
+"""
+Functions lib for the conditional requests (ETag / Last-Modified) of projects app
+"""
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from SoftDesk.db_routers import reads_from_replica
+from projects.libs import lib_response_cache
+
+
+def object_validators(obj) -> tuple[str, datetime]:
+    """
+    ETag and last modification date of a single object
+    """
+    return f'"{obj._meta.model_name}-{obj.pk}-{obj.updated_time.timestamp()}"', obj.updated_time
+
+
+def list_validators(request, queryset) -> tuple[str, None]:
+    """
+    ETag of a list, computed with one aggregate query instead of serializing it:
+    it changes when a row is created, updated or deleted, and between pages or query parameters.
+    Lists have no last modification date: the latest update of the rows does not move when a row is deleted.
+    """
+    version = queryset.aggregate(count=Count('id'), last_update=Max('updated_time'))
+    return _list_etag(request, f"{version['count']}:{version['last_update']}"), None
+
+
+def project_list_validators(request, project_id, queryset) -> tuple[str, None]:
+    """
+    ETag of a list of a project's objects, made of the project's generation, bumped by every write to the project:
+    it costs no query. The generation only follows the primary: the lists read from a replica,
+    which may not show the last writes yet, fall back to the aggregate of list_validators.
+    """
+    if reads_from_replica():
+        return list_validators(request, queryset)
+    generation = lib_response_cache.project_generation(project_id)
+    return _list_etag(request, f'generation:{generation}:{lib_response_cache.SERIALIZER_VERSION}'), None
+
+
+def _list_etag(request, version: str) -> str:
+    fingerprint = f"{request.user.id}:{request.get_full_path()}:{version}"
+    return f'"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+
+
+def conditional_response(request, etag: Optional[str], last_modified: Optional[datetime]):
+    """
+    Returns a 304 response to a read, or a 412 response to a write,
+    when the conditional headers of the request tell so (None otherwise, or without an ETag)
+    """
+    if etag is None:
+        return None
+    response = get_conditional_response(request._request, etag=etag,
+                                        last_modified=last_modified and int(last_modified.timestamp()))
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def set_validators(response, etag: Optional[str], last_modified: Optional[datetime]):
+    if etag is None:
+        return response
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
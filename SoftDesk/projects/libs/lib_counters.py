@@ -0,0 +1,84 @@
+"""
+Functions lib for the denormalized counters of projects app:
+number of comments and last activity of the issues, number of issues and of open issues of the projects.
+The counters are only changed by F() updates, relative to the value in the database,
+so that concurrent writes add up instead of overwriting each other.
+The caller runs them in the transaction of the write they count.
+The counters being part of the representations, their changes are logged in the change feed.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from constants import ISSUE_CLOSED_STATUS
+from projects.libs import lib_changes, lib_response_cache
+from projects.models import Project, Issue, Comment
+
+
+def is_open(status: str) -> int:
+    return int(status != ISSUE_CLOSED_STATUS)
+
+
+def count_issues(project_id, issues: int, open_issues: int) -> None:
+    """
+    Adds (or removes, when negative) issues and open issues to the project's counters
+    """
+    if issues or open_issues:
+        Project.objects.filter(id=project_id).update(issue_count=F('issue_count') + issues,
+                                                     open_issue_count=F('open_issue_count') + open_issues,
+                                                     updated_time=timezone.now())
+        lib_changes.log_change(project_id, 'project', lib_changes.UPDATED, project_id)
+
+
+def count_comments(project_id, issue_id, comments: int) -> None:
+    """
+    Adds (or removes, when negative) comments to the issue's counter, which is activity on the issue
+    """
+    now = timezone.now()
+    Issue.objects.filter(id=issue_id).update(comment_count=F('comment_count') + comments,
+                                             last_activity_at=now, updated_time=now)
+    lib_changes.log_change(project_id, 'issue', lib_changes.UPDATED, issue_id)
+
+
+def touch_issue(project_id, issue_id) -> None:
+    now = timezone.now()
+    Issue.objects.filter(id=issue_id).update(last_activity_at=now, updated_time=now)
+    lib_changes.log_change(project_id, 'issue', lib_changes.UPDATED, issue_id)
+
+
+def reconcile_counters() -> dict:
+    """
+    Repairs the counters that drifted from the rows they count, with one UPDATE per counter.
+    The last activity of an issue is only moved forward, to its last comment change:
+    the changes of the issue itself are not recorded anywhere else.
+    Returns the number of repaired rows per model.
+    """
+    now = timezone.now()
+    comment_count = Coalesce(Subquery(Comment.objects.filter(issue=OuterRef('pk')).order_by()
+                                      .values('issue').annotate(count=Count('id')).values('count')), 0)
+    last_comment = Subquery(Comment.objects.filter(issue=OuterRef('pk')).order_by()
+                            .values('issue').annotate(last=Max('updated_time')).values('last'))
+    last_activity = Greatest('created_time', Coalesce(last_comment, 'created_time'))
+    issues = Issue.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    issue_count = Coalesce(Subquery(issues.annotate(count=Count('id')).values('count')), 0)
+    open_issue_count = Coalesce(Subquery(issues.exclude(status=ISSUE_CLOSED_STATUS)
+                                         .annotate(count=Count('id')).values('count')), 0)
+    with transaction.atomic():
+        drifted_issues = (Issue.objects.alias(actual_count=comment_count, actual_activity=last_activity)
+                          .exclude(comment_count=F('actual_count'), last_activity_at__gte=F('actual_activity')))
+        repaired_issues = list(drifted_issues.values_list('project_id', 'id'))
+        drifted_issues.update(comment_count=comment_count, last_activity_at=Greatest('last_activity_at', last_activity),
+                              updated_time=now)
+        drifted_projects = (Project.objects.alias(actual_count=issue_count, actual_open_count=open_issue_count)
+                            .exclude(issue_count=F('actual_count'), open_issue_count=F('actual_open_count')))
+        repaired_projects = list(drifted_projects.values_list('id', flat=True))
+        drifted_projects.update(issue_count=issue_count, open_issue_count=open_issue_count, updated_time=now)
+        for project_id, issue_id in repaired_issues:
+            lib_changes.log_change(project_id, 'issue', lib_changes.UPDATED, issue_id)
+        for project_id in repaired_projects:
+            lib_changes.log_change(project_id, 'project', lib_changes.UPDATED, project_id)
+        # the cached pages of these projects show the drifted counters
+        for project_id in {project_id for project_id, _ in repaired_issues}.union(repaired_projects):
+            lib_response_cache.bump_project_generation_on_commit(project_id)
+    return {'issues': len(repaired_issues), 'projects': len(repaired_projects)}
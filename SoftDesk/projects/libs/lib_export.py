@@ -0,0 +1,76 @@
+"""
+Functions lib for the streamed export of the issues and comments of projects app
+"""
+import csv
+from itertools import islice
+from typing import Generator, Iterator
+
+from django.db import router, transaction
+from rest_framework.renderers import JSONRenderer
+
+from SoftDesk import settings
+from projects.models import Issue, Comment
+from projects.serializers import IssueSerializer, CommentSerializer
+
+
+def project_issues(project_id) -> Generator[dict, None, None]:
+    """
+    Yields the issues of the project in creation order, each one with its comments.
+    The issues are read from a server-side cursor by chunks, and the comments of a chunk with one query,
+    so that memory does not grow with the size of the project.
+    Everything is read in a single transaction, i.e. from one snapshot of the database.
+    """
+    database = router.db_for_read(Issue)
+    with transaction.atomic(using=database):
+        issue_rows = (IssueSerializer.values_queryset(Issue.objects.using(database).filter(project=project_id))
+                      .order_by('created_time', 'id').iterator(chunk_size=settings.EXPORT_CHUNK_SIZE))
+        while True:
+            chunk = IssueSerializer.values_data(islice(issue_rows, settings.EXPORT_CHUNK_SIZE))
+            if not chunk:
+                return
+            comments = {issue['id']: [] for issue in chunk}
+            comment_rows = (CommentSerializer.values_queryset(Comment.objects.using(database)
+                                                              .filter(issue__in=list(comments)))
+                            .order_by('created_time', 'id'))
+            for comment in CommentSerializer.values_data(comment_rows):
+                comments[comment['issue']].append(comment)
+            for issue in chunk:
+                issue['comments'] = comments[issue['id']]
+                yield issue
+
+
+def ndjson_lines(issues: Generator[dict, None, None]) -> Iterator[bytes]:
+    """
+    One JSON line per issue, with the same representation as the API
+    """
+    renderer = JSONRenderer()
+    try:
+        for issue in issues:
+            yield renderer.render(issue) + b'\n'
+    finally:
+        # a stream stopped early ends the transaction of the export right away, in the thread streaming it
+        issues.close()
+
+
+class _Echo:
+    """
+    File-like object handing back what the csv writer writes, instead of buffering it
+    """
+    def write(self, value):
+        return value
+
+
+def csv_lines(issues: Generator[dict, None, None]) -> Iterator[str]:
+    """
+    One row per issue followed by one row per comment of the issue, told apart by the "type" column
+    """
+    fields = ['type'] + [name for name, _ in IssueSerializer.values_mapping()] + ['issue']
+    writer = csv.DictWriter(_Echo(), fieldnames=fields, extrasaction='ignore')
+    try:
+        yield writer.writeheader()
+        for issue in issues:
+            yield writer.writerow({'type': 'issue', **issue})
+            for comment in issue['comments']:
+                yield writer.writerow({'type': 'comment', **comment})
+    finally:
+        issues.close()
@@ -1,26 +1,91 @@
 """
 Functions lib for the permissions of project app
 """
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from SoftDesk import settings
+from SoftDesk.db_routers import PRIMARY
 from constants import PROJECT_ADMIN
 from projects.models import Contributor, Issue, Comment
 
+NOT_A_CONTRIBUTOR = ''
+
+membership_cache_stats = {'hits': 0, 'misses': 0}
+
+
+def membership_cache_key(user_id, project_id) -> str:
+    return f'membership:{int(project_id)}:{int(user_id)}'
+
+
+def find_project_role(user_id, project_id) -> Optional[str]:
+    """
+    Returns the role of a user in a project (None if not a contributor),
+    read from the shared membership cache and from the database on a miss.
+    Non-contributors are cached too, so that refused requests skip the database as well.
+    """
+    key = membership_cache_key(user_id, project_id)
+    role = cache.get(key)
+    if role is not None:
+        membership_cache_stats['hits'] += 1
+        return role or None
+
+    membership_cache_stats['misses'] += 1
+    # read from the primary: a replica may not have the latest contributor changes yet
+    role = (Contributor.objects.using(PRIMARY).filter(project=project_id, user=user_id)
+            .values_list('role', flat=True).first())
+    cache.set(key, role or NOT_A_CONTRIBUTOR, settings.MEMBERSHIP_CACHE_TIMEOUT)
+    return role
+
+
+def invalidate_project_roles(project_id, user_ids) -> None:
+    cache.delete_many([membership_cache_key(user_id, project_id) for user_id in user_ids])
+
+
+def invalidate_project_roles_on_commit(project_id, user_ids) -> None:
+    """
+    Invalidates the roles right away and again once the current transaction is committed
+    (only once outside of a transaction): a request reading the contributors before the commit
+    would otherwise cache the old role back for MEMBERSHIP_CACHE_TIMEOUT
+    """
+    user_ids = list(user_ids)
+    invalidate_project_roles(project_id, user_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: invalidate_project_roles(project_id, user_ids))
+
+
+def get_project_role(request, project_id) -> Optional[str]:
+    """
+    Returns the role of the requesting user in the given project (None if not a contributor).
+    The role is resolved once and memoized on the request,
+    so that every permission check of the request shares the same lookup.
+    """
+    if not request.user.is_authenticated:
+        return None
+    project_roles = getattr(request, '_project_roles', None)
+    if project_roles is None:
+        project_roles = request._project_roles = {}
+    project_id = int(project_id)
+    if project_id not in project_roles:
+        project_roles[project_id] = find_project_role(request.user.id, project_id)
+    return project_roles[project_id]
+
 
 def is_project_admin(request, view) -> bool:
     project_id = view.kwargs['id_project']
-    return Contributor.objects.filter(project=project_id, user=request.user.id,
-                                      role__in=PROJECT_ADMIN).exists()
+    return get_project_role(request, project_id) in PROJECT_ADMIN
 
 
 def is_project_contributor(request, view) -> bool:
     project_id = view.kwargs['id_project']
-    return Contributor.objects.filter(project=project_id, user=request.user.id).exists()
+    return get_project_role(request, project_id) is not None
 
 
-def is_issue_author(request, view) -> bool:
-    issue_id = view.kwargs['id_issue']
-    return Issue.objects.filter(id=issue_id, author=request.user.id).exists()
+def is_issue_author(request, view, obj: Issue) -> bool:
+    return obj.author_id == request.user.id
 
 
-def is_comment_author(request, view) -> bool:
-    comment_id = view.kwargs['id_comment']
-    return Comment.objects.filter(id=comment_id, author=request.user.id).exists()
+def is_comment_author(request, view, obj: Comment) -> bool:
+    return obj.author_id == request.user.id
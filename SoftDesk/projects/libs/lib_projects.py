@@ -3,9 +3,21 @@ Functions lib for the projects app
 """
 from typing import Any
 
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 
-from projects.models import Contributor, Project, Issue, Comment
+from SoftDesk import settings
+from constants import ISSUE_CLOSED_STATUS, ISSUE_PRIORITY_RANKS
+from projects.libs import lib_changes, lib_counters, lib_permissions, lib_response_cache
+from projects.models import Contributor, Project, Issue, Comment, IssueSummary
+from users.models import CustomUser
+
+
+# a concurrent write broke one of the contributor constraints
+CONTRIBUTORS_CONFLICT = {'conflict': 'Project contributors changed meanwhile, please try again'}
 
 
 def already_existing_project(project) -> list[Project]:
@@ -14,19 +26,104 @@ def already_existing_project(project) -> list[Project]:
                                                           type=project.type)]
 
 
-def has_manager(project: Project) -> bool:
-    return Contributor.objects.filter(project=project,
-                                      role='Manager').exists()
-
-
-def already_has_role(contributor: Contributor) -> list[Contributor]:
-    return [contributor for contributor
-            in Contributor.objects.filter(user=contributor.user,
-                                          project=contributor.project)]
-
-
-def already_registered_contributors(contributor: Contributor) -> list[Contributor]:
-    return [contributor for contributor in Contributor.objects.filter(user=contributor.user, role=contributor.role)]
+def contributors_errors(project_id: int, candidates: list[tuple[int, str]]) -> list[dict]:
+    """
+    Validates (user ID, role) candidates for a project against the existing contributors
+    and against each other, with a single query.
+    The query counts, per candidate user, their roles and whether they are in the project,
+    rather than loading every contributor row of the project.
+    Returns the errors of each candidate, in the same order.
+    """
+    user_ids = {user_id for user_id, _ in candidates}
+    roles = {role for _, role in candidates}
+    # one row per candidate user already registered, and one for the Manager of the project if any
+    rows = (Contributor.objects.filter(Q(user__in=user_ids) | Q(project=project_id, role='Manager'))
+            .values('user_id').order_by()
+            .annotate(in_project=Count('id', filter=Q(project=project_id)),
+                      manages_project=Count('id', filter=Q(project=project_id, role='Manager')),
+                      **{f'as_{role}': Count('id', filter=Q(role=role)) for role in roles}))
+
+    has_manager, project_users, registered_roles = False, set(), set()
+    for row in rows:
+        has_manager = has_manager or row['manages_project'] > 0
+        if row['in_project']:
+            project_users.add(row['user_id'])
+        registered_roles.update((row['user_id'], role) for role in roles if row[f'as_{role}'])
+
+    all_errors = []
+    for user_id, role in candidates:
+        errors = {}
+        if role == 'Creator':
+            errors['creator'] = 'Project creator cannot be added manually'
+        if has_manager and role == 'Manager':
+            errors['has_manager'] = 'Project already has a registered Manager'
+        if user_id in project_users:
+            errors['already_has_role'] = 'User already has another role in the project'
+        if (user_id, role) in registered_roles:
+            errors['already_contributor'] = 'User already registered as contributor'
+        all_errors.append(errors)
+
+        project_users.add(user_id)
+        registered_roles.add((user_id, role))
+        has_manager = has_manager or role == 'Manager'
+    return all_errors
+
+
+def role_change_errors(contributor: Contributor, role: str) -> dict:
+    """
+    Validates the new role of an existing contributor against the other contributors of the project
+    """
+    errors = {}
+    if role == 'Manager' and contributor.role != 'Manager' \
+            and Contributor.objects.filter(project=contributor.project_id, role='Manager').exists():
+        errors['has_manager'] = 'Project already has a registered Manager'
+    return errors
+
+
+def find_existing_user_ids(user_ids) -> set[int]:
+    return set(CustomUser.objects.filter(id__in=user_ids).values_list('id', flat=True))
+
+
+def add_contributors(project: Project, candidates: list[tuple[int, str]]) -> list[Contributor]:
+    """
+    Inserts already validated (user ID, role) candidates with a single query.
+    Raises a ValidationError when concurrent writes made them conflict with the contributors meanwhile.
+    """
+    user_ids = [user_id for user_id, _ in candidates]
+    try:
+        with transaction.atomic():
+            Contributor.objects.bulk_create([Contributor(user_id=user_id, project=project, role=role)
+                                             for user_id, role in candidates])
+            contributors = list(Contributor.objects.filter(project=project, user__in=user_ids))
+            lib_changes.log_changes(project.id, 'contributor', lib_changes.CREATED,
+                                    [contributor.id for contributor in contributors])
+            # bulk_create sends no post_save signal
+            lib_permissions.invalidate_project_roles_on_commit(project.id, user_ids)
+            lib_response_cache.bump_project_generation_on_commit(project.id)
+    except IntegrityError:
+        raise ValidationError({'errors': CONTRIBUTORS_CONFLICT})
+    return contributors
+
+
+def delete_project(project: Project) -> None:
+    """
+    Deletes a project and all it holds with one DELETE per table, children first,
+    instead of letting Django's collector load every row to send its deletion signals.
+    The caches these signals keep up to date are invalidated explicitly.
+    """
+    project_id = project.id
+    user_ids = list(Contributor.objects.filter(project=project_id).values_list('user_id', flat=True))
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Comment._meta.db_table} WHERE issue_id IN '
+                           f'(SELECT id FROM {Issue._meta.db_table} WHERE project_id = %s)', [project_id])
+            for model in (IssueSummary, Issue, Contributor):
+                cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE project_id = %s', [project_id])
+        # nothing left to cascade: the collector only deletes the project row
+        project.delete()
+        lib_changes.log_change(project_id, 'project', lib_changes.DELETED, project_id)
+        lib_permissions.invalidate_project_roles_on_commit(project_id, user_ids)
+        lib_response_cache.bump_project_generation_on_commit(project_id)
 
 
 def find_obj_by_id(_obj, obj_id) -> Any:
@@ -36,18 +133,118 @@ def find_obj_by_id(_obj, obj_id) -> Any:
 
 def find_contributor(queryset, kwargs) -> Contributor:
     project_id, contributor_id = kwargs['id_project'], kwargs['id_user']
-    contributor = get_object_or_404(queryset.filter(project_id=project_id, user_id=contributor_id))
+    contributor = get_object_or_404(queryset.filter(project_id=project_id, user_id=contributor_id)
+                                    .select_related('user').only('id', 'role', 'project', 'user__username'))
     return contributor
 
 
+# keyset orderings of the issue lists, each one ending with the unique ID
+ISSUE_ORDERINGS = {
+    'created_time': ('created_time', 'id'),
+    '-created_time': ('-created_time', '-id'),
+    'priority': ('priority_rank', 'id'),
+    '-priority': ('-priority_rank', '-id'),
+    'last_activity': ('last_activity_at', 'id'),
+    '-last_activity': ('-last_activity_at', '-id'),
+}
+
+
+def filter_issues(queryset, filters: dict):
+    """
+    Applies the validated query parameters of the issue list as SQL conditions
+    """
+    lookups = {'assignee': 'assignee_id', 'author': 'author_id',
+               'created_after': 'created_time__gte', 'created_before': 'created_time__lt'}
+    if 'priority' in filters:
+        # served by the priority rank index
+        filters = {**filters, 'priority_rank': ISSUE_PRIORITY_RANKS[filters['priority']]}
+        del filters['priority']
+    return queryset.filter(**{lookups.get(field, field): value for field, value in filters.items()})
+
+
+def expand_issues(queryset, expand):
+    """
+    Loads the related objects embedded in the issues with the same number of queries whatever the number of issues:
+    users and project are joined, the comments of all the issues are fetched by a single extra query
+    """
+    related = [name for name in ('author', 'assignee', 'project') if name in expand]
+    if related:
+        queryset = queryset.select_related(*related)
+    if 'comments' in expand:
+        queryset = queryset.prefetch_related(
+            Prefetch('comment_set', queryset=Comment.objects.order_by('created_time', 'id')))
+    return queryset
+
+
+def expand_comments(queryset, expand):
+    related = [name for name in ('author', 'issue') if name in expand]
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset
+
+
 def find_issue(queryset, kwargs) -> Issue:
     project_id, issue_id = kwargs['id_project'], kwargs['id_issue']
     issue = get_object_or_404(queryset.filter(project=project_id, id=issue_id))
     return issue
 
 
-def find_comment(queryset, kwargs) -> Comment:
+def find_comment(queryset, kwargs, expand=()) -> Comment:
     project_id = kwargs['id_project']
     issue_id, comment_id = kwargs['id_issue'], kwargs['id_comment']
-    comment = get_object_or_404(queryset.filter(issue__project=project_id, issue=issue_id, id=comment_id))
+    queryset = queryset.filter(issue__project=project_id, issue=issue_id, id=comment_id)
+    if expand:
+        # embedded objects are loaded whole
+        comment = get_object_or_404(expand_comments(queryset.select_related('issue'), expand))
+    else:
+        comment = get_object_or_404(queryset.select_related('issue').only('id', 'description', 'author',
+                                                                          'created_time', 'updated_time',
+                                                                          'issue__project'))
     return comment
+
+
+def create_issues(project: Project, author_id: int, rows: list[dict]) -> int:
+    """
+    Inserts already validated issues by batches, all of them or none
+    """
+    # bulk_create does not call Issue.save, which sets the priority rank
+    issues = [Issue(project=project, author_id=author_id, assignee_id=row.pop('assignee', None),
+                    priority_rank=ISSUE_PRIORITY_RANKS[row['priority']], **row)
+              for row in rows]
+    with transaction.atomic():
+        Issue.objects.bulk_create(issues, batch_size=settings.BULK_BATCH_SIZE)
+        lib_counters.count_issues(project.id, len(issues),
+                                  sum(lib_counters.is_open(issue.status) for issue in issues))
+        if connection.features.can_return_rows_from_bulk_insert:
+            issue_ids = [issue.id for issue in issues]
+        else:
+            # SQLite holds the write lock of the transaction since the first insert:
+            # the last IDs of the table are those of the inserted issues
+            issue_ids = sorted(Issue.objects.order_by('-id').values_list('id', flat=True)[:len(issues)])
+        lib_changes.log_changes(project.id, 'issue', lib_changes.CREATED, issue_ids)
+        lib_response_cache.bump_project_generation_on_commit(project.id)
+    return len(issues)
+
+
+def update_issues(project_id: int, author_id: int, filters: dict, changes: dict) -> list[int]:
+    """
+    Applies the same changes to the issues of the author matching the filters, with a single UPDATE.
+    Returns the IDs of the updated issues.
+    """
+    lookups = {'ids': 'id__in', 'assignee': 'assignee_id'}
+    issues = Issue.objects.filter(project=project_id, author=author_id,
+                                  **{lookups.get(field, field): value for field, value in filters.items()})
+    if 'priority' in changes:
+        changes = {**changes, 'priority_rank': ISSUE_PRIORITY_RANKS[changes['priority']]}
+    with transaction.atomic():
+        issue_ids = list(issues.values_list('id', flat=True))
+        if 'status' in changes:
+            open_before = issues.exclude(status=ISSUE_CLOSED_STATUS).count()
+            open_after = len(issue_ids) * lib_counters.is_open(changes['status'])
+            lib_counters.count_issues(project_id, 0, open_after - open_before)
+        now = timezone.now()
+        issues.update(updated_time=now, last_activity_at=now,
+                      **{lookups.get(field, field): value for field, value in changes.items()})
+        lib_changes.log_changes(project_id, 'issue', lib_changes.UPDATED, issue_ids)
+        lib_response_cache.bump_project_generation_on_commit(project_id)
+    return issue_ids
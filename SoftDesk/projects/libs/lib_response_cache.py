@@ -0,0 +1,123 @@
+"""
+Functions lib for the cache of the rendered list pages of projects app
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from SoftDesk import settings
+from SoftDesk.db_routers import reads_from_replica
+
+# to bump whenever the output of the serializers of the cached lists changes
+SERIALIZER_VERSION = 2
+
+response_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+_pages = OrderedDict()
+_pages_size = 0
+_pages_lock = threading.Lock()
+
+
+def response_cache_hit_rate() -> float:
+    lookups = response_cache_stats['hits'] + response_cache_stats['misses']
+    return response_cache_stats['hits'] / lookups if lookups else 0.0
+
+
+def generation_key(project_id) -> str:
+    return f'generation:{int(project_id)}'
+
+
+def project_generation(project_id) -> int:
+    """
+    Returns the generation of the project's cached pages, shared by every process through the default cache.
+    A missing generation starts from the current time rather than from 0,
+    so that a cleared (or culled) shared cache cannot bring back the number of older cached pages.
+    """
+    key = generation_key(project_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_project_generation(project_id) -> None:
+    """
+    Makes every cached page of the project stale
+    """
+    try:
+        cache.incr(generation_key(project_id))
+    except ValueError:
+        cache.add(generation_key(project_id), time.time_ns(), None)
+
+
+def bump_project_generation_on_commit(project_id) -> None:
+    """
+    Bumps the generation once the current transaction is committed (right away outside of a transaction),
+    so that a page cannot be cached again from the data about to be replaced
+    """
+    transaction.on_commit(lambda: bump_project_generation(project_id))
+
+
+def page_cache_key(request, project_id, list_name: str) -> Optional[tuple]:
+    """
+    Identifies a page by its project generation, URL (with the normalized query string) and rendering.
+    Returns None when the page is not rendered as JSON (browsable API), it is not cached then.
+    """
+    if not isinstance(request.accepted_renderer, JSONRenderer):
+        return None
+    query = sorted((param, tuple(values)) for param, values in request.query_params.lists()
+                   if param != 'format')
+    return (int(project_id), project_generation(project_id), SERIALIZER_VERSION, list_name,
+            request.build_absolute_uri(request.path), tuple(query),
+            request.accepted_media_type)
+
+
+def find_page(request, cache_key: Optional[tuple]) -> Optional[HttpResponse]:
+    if cache_key is None:
+        return None
+    with _pages_lock:
+        content = _pages.get(cache_key)
+        if content is None:
+            response_cache_stats['misses'] += 1
+            return None
+        _pages.move_to_end(cache_key)
+        response_cache_stats['hits'] += 1
+    return _page_response(request, content, 'HIT')
+
+
+def store_page(request, cache_key: Optional[tuple], response):
+    """
+    Renders the paginated response once and keeps the bytes in the size-bounded LRU,
+    evicting the least recently used pages first.
+    Pages read from a replica are not kept: the replica may still lag behind the generation bump.
+    """
+    global _pages_size
+    if cache_key is None:
+        return response
+    content = request.accepted_renderer.render(response.data, request.accepted_media_type,
+                                               {'request': request, 'view': request.parser_context['view']})
+    if len(content) <= settings.RESPONSE_CACHE_MAX_BYTES and not reads_from_replica():
+        with _pages_lock:
+            previous = _pages.pop(cache_key, None)
+            if previous is not None:
+                _pages_size -= len(previous)
+            _pages[cache_key] = content
+            _pages_size += len(content)
+            while _pages_size > settings.RESPONSE_CACHE_MAX_BYTES:
+                _, evicted = _pages.popitem(last=False)
+                _pages_size -= len(evicted)
+                response_cache_stats['evictions'] += 1
+    return _page_response(request, content, 'MISS')
+
+
+def _page_response(request, content: bytes, cache_status: str) -> HttpResponse:
+    response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+    response['X-Cache'] = cache_status
+    return response
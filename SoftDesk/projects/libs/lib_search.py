@@ -0,0 +1,78 @@
+"""
+Functions lib for the full-text search of projects app, over the projects_search FTS5 table
+"""
+import re
+from typing import Optional
+
+from django.db import connection, transaction
+
+# weights of the title, body, project, kind and issue_id columns in the ranking
+RANK = 'bm25(projects_search, 10.0, 1.0, 0.0, 0.0, 0.0)'
+HIGHLIGHT_START, HIGHLIGHT_END, ELLIPSIS = '<mark>', '</mark>', '…'
+SNIPPET_TOKENS = 16
+
+SEARCH_QUERY = f"""
+    SELECT rowid, kind, issue_id,
+           highlight(projects_search, 0, %s, %s),
+           snippet(projects_search, 1, %s, %s, %s, {SNIPPET_TOKENS}),
+           {RANK}
+    FROM projects_search
+    WHERE projects_search MATCH %s
+    ORDER BY {RANK}
+    LIMIT %s
+"""
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM projects_search",
+    "INSERT INTO projects_search (rowid, title, body, project, kind, issue_id) "
+    "SELECT id * 2, title, description, project_id, 'issue', id FROM projects_issue",
+    "INSERT INTO projects_search (rowid, title, body, project, kind, issue_id) "
+    "SELECT c.id * 2 + 1, '', c.description, i.project_id, 'comment', c.issue_id "
+    "FROM projects_comment c JOIN projects_issue i ON i.id = c.issue_id",
+    "INSERT INTO projects_search (projects_search) VALUES ('optimize')",
+]
+
+
+def match_expression(project_id, text: str) -> Optional[str]:
+    """
+    Turns the user's text into an FTS5 query on the title and body of the project's documents:
+    every word must match, a word ending with * matches as a prefix.
+    Words are quoted, so that the FTS5 operators of the text are searched as plain words.
+    """
+    terms = [f'"{word}"{prefix}' for word, prefix in re.findall(r'(\w+)(\*?)', text)]
+    if not terms:
+        return None
+    return f'project : "{int(project_id)}" AND {{title body}} : ({" ".join(terms)})'
+
+
+def search_project(project_id, text: str, limit: int) -> list[dict]:
+    """
+    Returns the best ranked issues and comments of the project matching the text,
+    with the matched words highlighted
+    """
+    expression = match_expression(project_id, text)
+    if expression is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_QUERY, [HIGHLIGHT_START, HIGHLIGHT_END, HIGHLIGHT_START, HIGHLIGHT_END, ELLIPSIS,
+                                      expression, limit])
+        rows = cursor.fetchall()
+    return [{
+        'type': kind,
+        'id': rowid // 2,
+        'issue': issue_id,
+        'title': title,
+        'snippet': snippet,
+        'score': -rank,
+    } for rowid, kind, issue_id, title, snippet, rank in rows]
+
+
+def rebuild_search_index() -> int:
+    """
+    Re-indexes every issue and comment, returns the number of indexed documents
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        for statement in REBUILD_STATEMENTS:
+            cursor.execute(statement)
+        cursor.execute("SELECT count(*) FROM projects_search")
+        return cursor.fetchone()[0]
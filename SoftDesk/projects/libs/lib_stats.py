@@ -0,0 +1,73 @@
+"""
+Functions lib for the dashboard counts of projects app
+"""
+from django.db import connection, transaction
+from django.db.models import CharField, Count, IntegerField, Value
+
+from SoftDesk import settings
+from constants import CONTRIBUTOR_ROLES, ISSUE_PRIORITIES, ISSUE_STATUSES, ISSUE_TAGS
+from projects.models import Contributor, Issue, IssueSummary
+
+
+def stats_groups(project_id):
+    """
+    Number of issues of the project per (status, priority, tag, assignee) and of its contributors per role,
+    in one query: the union of the issue groups, from the materialized summary when enabled
+    (a handful of rows whatever the number of issues) or else grouped from the issues,
+    and of the role groups, whose role comes in the status column
+    """
+    if settings.PROJECT_STATS_FROM_SUMMARY and connection.vendor == 'sqlite':
+        issues = IssueSummary.objects.filter(project=project_id).values('status', 'priority', 'tag', 'assignee_id',
+                                                                        'count')
+    else:
+        issues = Issue.objects.filter(project=project_id) \
+            .values('status', 'priority', 'tag', 'assignee_id').annotate(count=Count('id'))
+    issues = issues.annotate(kind=Value('issue')).order_by()
+    roles = Contributor.objects.filter(project=project_id).values('role') \
+        .annotate(priority=Value(None, CharField()), tag=Value(None, CharField()),
+                  assignee_id=Value(None, IntegerField()), count=Count('id'), kind=Value('role')).order_by()
+    return issues.union(roles, all=True)
+
+
+def project_stats(project_id) -> dict:
+    """
+    Counts of the project's issues per status, priority, tag and assignee, and of its contributors per role
+    """
+    issues = {
+        'total': 0,
+        'status': dict.fromkeys([value for value, _ in ISSUE_STATUSES], 0),
+        'priority': dict.fromkeys([value for value, _ in ISSUE_PRIORITIES], 0),
+        'tag': dict.fromkeys([value for value, _ in ISSUE_TAGS], 0),
+    }
+    assignees = {}
+    roles = dict.fromkeys([value for value, _ in CONTRIBUTOR_ROLES], 0)
+    for group in stats_groups(project_id):
+        if group['kind'] == 'role':
+            roles[group['status']] = group['count']
+            continue
+        issues['total'] += group['count']
+        for field in ('status', 'priority', 'tag'):
+            issues[field][group[field]] += group['count']
+        assignee = group['assignee_id'] or None
+        assignees[assignee] = assignees.get(assignee, 0) + group['count']
+    issues['assignee'] = [{'assignee': assignee, 'count': count}
+                          for assignee, count in sorted(assignees.items(), key=lambda item: item[0] or 0)]
+    return {
+        'project': int(project_id),
+        'issues': issues,
+        'contributors': {'total': sum(roles.values()), 'role': roles},
+    }
+
+
+def rebuild_issue_summary() -> int:
+    """
+    Recomputes the materialized summary from the issues, returns the number of summary rows
+    """
+    with transaction.atomic():
+        IssueSummary.objects.all().delete()
+        IssueSummary.objects.bulk_create(
+            [IssueSummary(assignee_id=group.pop('assignee_id') or 0, **group)
+             for group in Issue.objects.values('project_id', 'status', 'priority', 'tag', 'assignee_id')
+                                       .annotate(count=Count('id')).order_by()],
+            batch_size=settings.BULK_BATCH_SIZE)
+        return IssueSummary.objects.count()
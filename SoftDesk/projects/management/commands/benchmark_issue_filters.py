@@ -0,0 +1,29 @@
+"""
+Times the first page of the issue list for each filter and ordering on a seeded project
+"""
+from django.core.management.base import BaseCommand
+from rest_framework.settings import api_settings
+
+from SoftDesk import benchmarks
+from projects.libs import lib_benchmarks, lib_projects
+
+
+class Command(BaseCommand):
+    help = ('Seeds a project (rolled back at the end), then shows the plan and timings of the first page '
+            'of the issue list for each filter and each ordering')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=100000, help='number of seeded issues (default 100000)')
+        parser.add_argument('--repeat', type=int, default=20, help='runs of each query (default 20)')
+
+    def handle(self, *args, **options):
+        with benchmarks.rolled_back():
+            project_id = lib_benchmarks.seed_project(options['issues'])
+            for filter_name, filters in lib_benchmarks.issue_list_filters(project_id).items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Filter: {filter_name}'))
+                for ordering in lib_projects.ISSUE_ORDERINGS:
+                    queryset = lib_benchmarks.issue_page(project_id, filters, ordering, api_settings.PAGE_SIZE)
+                    timing = benchmarks.timings(lambda: list(queryset.all()), options['repeat'])
+                    self.stdout.write(f"  ordering {ordering}: median {timing['median_ms']:.3f} ms, "
+                                      f"p95 {timing['p95_ms']:.3f} ms\n"
+                                      f"    {benchmarks.query_plan(queryset)}")
@@ -0,0 +1,36 @@
+"""
+Times the hot queries of the API on a seeded project, with and without the composite indexes
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from SoftDesk import benchmarks
+from projects.libs import lib_benchmarks
+from projects.models import Contributor, Project, Issue, Comment
+
+
+class Command(BaseCommand):
+    help = ('Seeds a project (rolled back at the end), then shows the plan and timings of the hot queries, '
+            'with the indexes of the models and with only those of the foreign keys, as before migration 0008')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--issues', type=int, default=100000, help='number of seeded issues (default 100000)')
+        parser.add_argument('--repeat', type=int, default=50, help='runs of each query (default 50)')
+
+    def handle(self, *args, **options):
+        with benchmarks.rolled_back():
+            project_id = lib_benchmarks.seed_project(options['issues'], comments_per_issue=1)
+            queries = lib_benchmarks.hot_queries(project_id)
+            self.report('With the indexes', queries, options['repeat'])
+            with connection.cursor() as cursor:
+                for model in (Project, Contributor, Issue, Comment):
+                    for index in model._meta.indexes:
+                        cursor.execute(f'DROP INDEX IF EXISTS {index.name}')
+            self.report('Without the composite indexes', queries, options['repeat'])
+
+    def report(self, title: str, queries: dict, repeat: int):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, (queryset, _) in queries.items():
+            timing = benchmarks.timings(lambda: list(queryset.all()), repeat)
+            self.stdout.write(f"  {name}: median {timing['median_ms']:.3f} ms, p95 {timing['p95_ms']:.3f} ms\n"
+                              f"    {benchmarks.query_plan(queryset)}")
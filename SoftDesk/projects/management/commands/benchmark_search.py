@@ -0,0 +1,41 @@
+"""
+Times the full-text search of a seeded project
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.settings import api_settings
+
+from SoftDesk import benchmarks
+from projects.libs import lib_benchmarks, lib_search
+
+QUERIES = {
+    'common word': 'login',
+    'two words': 'login crash',
+    'prefix': 'pay*',
+    'issue number': '4711',
+    'no match': 'nothing',
+}
+
+
+class Command(BaseCommand):
+    help = ('Seeds a project whose issues and comments are indexed by the search triggers (rolled back at the end), '
+            'then times the search queries')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=100000,
+                            help='number of seeded issues and comments, half of each (default 100000)')
+        parser.add_argument('--repeat', type=int, default=20, help='runs of each query (default 20)')
+
+    def handle(self, *args, **options):
+        with benchmarks.rolled_back():
+            project_id = lib_benchmarks.seed_project(options['documents'] // 2, comments_per_issue=1)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM projects_search WHERE projects_search MATCH %s',
+                               [f'project : "{project_id}"'])
+                self.stdout.write(f'{cursor.fetchone()[0]} indexed documents')
+            for name, text in QUERIES.items():
+                results = lib_search.search_project(project_id, text, api_settings.PAGE_SIZE)
+                timing = benchmarks.timings(
+                    lambda: lib_search.search_project(project_id, text, api_settings.PAGE_SIZE), options['repeat'])
+                self.stdout.write(f"{name} ({text}): median {timing['median_ms']:.2f} ms, "
+                                  f"p95 {timing['p95_ms']:.2f} ms, {len(results)} results")
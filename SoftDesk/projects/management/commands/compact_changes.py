@@ -0,0 +1,19 @@
+"""
+Compacts the change feed of the projects
+"""
+from django.core.management.base import BaseCommand
+
+from SoftDesk import settings
+from projects.libs import lib_changes
+
+
+class Command(BaseCommand):
+    help = 'Deletes the changes older than the retention of the change feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CHANGE_LOG_RETENTION_DAYS,
+                            help=f'retention in days (default {settings.CHANGE_LOG_RETENTION_DAYS})')
+
+    def handle(self, *args, **options):
+        deleted = lib_changes.compact_changes(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} changes deleted'))
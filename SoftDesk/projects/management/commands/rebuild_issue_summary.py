@@ -0,0 +1,14 @@
+"""
+Rebuilds the materialized issue counts read by the project stats
+"""
+from django.core.management.base import BaseCommand
+
+from projects.libs import lib_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the issue summary table from the issues'
+
+    def handle(self, *args, **options):
+        rows = lib_stats.rebuild_issue_summary()
+        self.stdout.write(self.style.SUCCESS(f'{rows} summary rows'))
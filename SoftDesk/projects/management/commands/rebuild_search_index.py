@@ -0,0 +1,14 @@
+"""
+Rebuilds the full-text search index of the issues and comments
+"""
+from django.core.management.base import BaseCommand
+
+from projects.libs import lib_search
+
+
+class Command(BaseCommand):
+    help = 'Re-indexes every issue and comment in the full-text search table'
+
+    def handle(self, *args, **options):
+        indexed = lib_search.rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f'{indexed} documents indexed'))
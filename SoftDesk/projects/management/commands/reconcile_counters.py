@@ -0,0 +1,15 @@
+"""
+Repairs the denormalized comment, issue and activity counters
+"""
+from django.core.management.base import BaseCommand
+
+from projects.libs import lib_counters
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the counters of the issues and projects that drifted from their comments and issues'
+
+    def handle(self, *args, **options):
+        repaired = lib_counters.reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(f"{repaired['issues']} issues and "
+                                             f"{repaired['projects']} projects repaired"))
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.8 on 2026-10-18 14:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_indexes'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='contributor',
+            constraint=models.UniqueConstraint(condition=models.Q(('role', 'Manager')), fields=('project',), name='unique_project_manager'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.8 on 2026-10-18 14:25
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+from constants import ISSUE_PRIORITY_RANKS
+
+
+def fill_priority_ranks(apps, schema_editor):
+    Issue = apps.get_model('projects', 'Issue')
+    Issue.objects.update(priority_rank=Case(*[When(priority=priority, then=Value(rank))
+                                              for priority, rank in ISSUE_PRIORITY_RANKS.items()],
+                                            default=Value(0)))
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_updated_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_priority_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'status', 'created_time', 'id'], name='issue_project_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'tag', 'created_time', 'id'], name='issue_project_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'assignee', 'created_time', 'id'], name='issue_project_assignee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'author', 'created_time', 'id'], name='issue_project_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'priority_rank', 'id'], name='issue_project_priority_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+from django.db import migrations
+
+# Issues and comments share the full-text index: rowid = 2 * issue ID, or 2 * comment ID + 1.
+# The triggers keep it in line with every write, bulk ones included.
+# Django alters a column of projects_issue on SQLite by rebuilding the table, which drops its triggers:
+# these ones and the IssueSummary ones of 0013. A migration rebuilding the table has to drop them before
+# and create them again after, as 0014 does, or the index and the summary silently stop following the writes.
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE projects_search USING fts5(
+        title, body, project, kind UNINDEXED, issue_id UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER projects_search_issue_insert AFTER INSERT ON projects_issue BEGIN
+        INSERT INTO projects_search (rowid, title, body, project, kind, issue_id)
+        VALUES (new.id * 2, new.title, new.description, new.project_id, 'issue', new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER projects_search_issue_update AFTER UPDATE OF title, description ON projects_issue BEGIN
+        UPDATE projects_search SET title = new.title, body = new.description WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER projects_search_issue_delete AFTER DELETE ON projects_issue BEGIN
+        DELETE FROM projects_search WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER projects_search_comment_insert AFTER INSERT ON projects_comment BEGIN
+        INSERT INTO projects_search (rowid, title, body, project, kind, issue_id)
+        SELECT new.id * 2 + 1, '', new.description, project_id, 'comment', new.issue_id
+        FROM projects_issue WHERE id = new.issue_id;
+    END
+    """,
+    """
+    CREATE TRIGGER projects_search_comment_update AFTER UPDATE OF description ON projects_comment BEGIN
+        UPDATE projects_search SET body = new.description WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER projects_search_comment_delete AFTER DELETE ON projects_comment BEGIN
+        DELETE FROM projects_search WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS projects_search_issue_insert',
+    'DROP TRIGGER IF EXISTS projects_search_issue_update',
+    'DROP TRIGGER IF EXISTS projects_search_issue_delete',
+    'DROP TRIGGER IF EXISTS projects_search_comment_insert',
+    'DROP TRIGGER IF EXISTS projects_search_comment_update',
+    'DROP TRIGGER IF EXISTS projects_search_comment_delete',
+    'DROP TABLE IF EXISTS projects_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SEARCH_INDEX:
+        schema_editor.execute(statement)
+    schema_editor.execute(
+        "INSERT INTO projects_search (rowid, title, body, project, kind, issue_id) "
+        "SELECT id * 2, title, description, project_id, 'issue', id FROM projects_issue")
+    schema_editor.execute(
+        "INSERT INTO projects_search (rowid, title, body, project, kind, issue_id) "
+        "SELECT c.id * 2 + 1, '', c.description, i.project_id, 'comment', c.issue_id "
+        "FROM projects_comment c JOIN projects_issue i ON i.id = c.issue_id")
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SEARCH_INDEX:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_issue_filters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 3.2.8 on 2026-10-18 14:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Each issue write moves one unit between the summary rows of its (status, priority, tag, assignee),
+# the unassigned issues being counted under assignee 0.
+# Removing an issue only decrements an existing row: when its project is being deleted,
+# the summary rows may already be gone and must not be created again.
+COUNT_ISSUE = """
+    INSERT INTO projects_issuesummary (project_id, status, priority, tag, assignee_id, count)
+    VALUES (new.project_id, new.status, new.priority, new.tag, coalesce(new.assignee_id, 0), 1)
+    ON CONFLICT (project_id, status, priority, tag, assignee_id) DO UPDATE SET count = count + 1;
+"""
+UNCOUNT_ISSUE = """
+    UPDATE projects_issuesummary SET count = count - 1
+    WHERE project_id = old.project_id AND status = old.status AND priority = old.priority AND tag = old.tag
+        AND assignee_id = coalesce(old.assignee_id, 0);
+    DELETE FROM projects_issuesummary
+    WHERE project_id = old.project_id AND status = old.status AND priority = old.priority AND tag = old.tag
+        AND assignee_id = coalesce(old.assignee_id, 0) AND count <= 0;
+"""
+
+CREATE_SUMMARY_TRIGGERS = [
+    f"""
+    CREATE TRIGGER projects_issuesummary_insert AFTER INSERT ON projects_issue BEGIN
+        {COUNT_ISSUE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER projects_issuesummary_update
+    AFTER UPDATE OF project_id, status, priority, tag, assignee_id ON projects_issue BEGIN
+        {UNCOUNT_ISSUE}
+        {COUNT_ISSUE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER projects_issuesummary_delete AFTER DELETE ON projects_issue BEGIN
+        {UNCOUNT_ISSUE}
+    END
+    """,
+]
+
+DROP_SUMMARY_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS projects_issuesummary_insert',
+    'DROP TRIGGER IF EXISTS projects_issuesummary_update',
+    'DROP TRIGGER IF EXISTS projects_issuesummary_delete',
+]
+
+
+def create_summary_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SUMMARY_TRIGGERS:
+        schema_editor.execute(statement)
+    schema_editor.execute(
+        "INSERT INTO projects_issuesummary (project_id, status, priority, tag, assignee_id, count) "
+        "SELECT project_id, status, priority, tag, coalesce(assignee_id, 0), count(*) FROM projects_issue "
+        "GROUP BY project_id, status, priority, tag, coalesce(assignee_id, 0)")
+
+
+def drop_summary_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SUMMARY_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('Todo', 'Todo'), ('Handled', 'Handled'), ('Closed', 'Closed')], max_length=10)),
+                ('priority', models.CharField(choices=[('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High')], max_length=10)),
+                ('tag', models.CharField(choices=[('Bug', 'Bug'), ('Feature', 'Feature'), ('Task', 'Task')], max_length=10)),
+                ('assignee_id', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='issuesummary',
+            constraint=models.UniqueConstraint(fields=('project', 'status', 'priority', 'tag', 'assignee_id'), name='unique_issue_summary'),
+        ),
+        migrations.RunPython(create_summary_triggers, drop_summary_triggers),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 3.2.8 on 2026-10-18 14:41
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+import django.utils.timezone
+
+from constants import ISSUE_CLOSED_STATUS
+
+search_index = import_module('projects.migrations.0012_search_index')
+issue_summary = import_module('projects.migrations.0013_issue_summary')
+
+# SQLite adds the columns by rebuilding the tables, which drops the triggers of the issue table
+# and breaks those of the comment table reading it: they are set aside meanwhile.
+# The rebuild leaves the rows as they are, nothing has to be indexed or counted again.
+CREATE_TRIGGERS = [statement for statement in search_index.CREATE_SEARCH_INDEX if 'CREATE TRIGGER' in statement] \
+    + issue_summary.CREATE_SUMMARY_TRIGGERS
+DROP_TRIGGERS = [statement for statement in search_index.DROP_SEARCH_INDEX if 'DROP TRIGGER' in statement] \
+    + issue_summary.DROP_SUMMARY_TRIGGERS
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def fill_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Issue = apps.get_model('projects', 'Issue')
+    Comment = apps.get_model('projects', 'Comment')
+    comments = Comment.objects.filter(issue=OuterRef('pk')).order_by().values('issue')
+    Issue.objects.update(
+        comment_count=Coalesce(Subquery(comments.annotate(count=Count('id')).values('count')), 0),
+        # the last change of an issue is only known through its update time
+        last_activity_at=Greatest('updated_time', Coalesce(Subquery(comments.annotate(last=Max('updated_time'))
+                                                                    .values('last')), 'updated_time')))
+    issues = Issue.objects.filter(project=OuterRef('pk')).order_by().values('project')
+    Project.objects.update(
+        issue_count=Coalesce(Subquery(issues.annotate(count=Count('id')).values('count')), 0),
+        open_issue_count=Coalesce(Subquery(issues.exclude(status=ISSUE_CLOSED_STATUS)
+                                           .annotate(count=Count('id')).values('count')), 0))
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_issue_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_statements(DROP_TRIGGERS), run_statements(CREATE_TRIGGERS)),
+        migrations.AddField(
+            model_name='issue',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='issue',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='issue_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_issue_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(run_statements(CREATE_TRIGGERS), run_statements(DROP_TRIGGERS)),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['project', 'last_activity_at', 'id'], name='issue_project_activity_idx'),
+        ),
+    ]
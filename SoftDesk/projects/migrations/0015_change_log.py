@@ -0,0 +1,54 @@
+# Generated by Django 3.2.8 on 2026-10-18 14:45
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# The existing objects open the feed as created, so that a client can sync from sequence number 0
+SEED_CHANGE_LOG = [
+    "INSERT INTO projects_changelogentry (project_id, object_type, object_id, issue_id, action, created_time) "
+    "SELECT id, 'project', id, NULL, 'created', %s FROM projects_project ORDER BY id",
+    "INSERT INTO projects_changelogentry (project_id, object_type, object_id, issue_id, action, created_time) "
+    "SELECT project_id, 'contributor', id, NULL, 'created', %s FROM projects_contributor ORDER BY id",
+    "INSERT INTO projects_changelogentry (project_id, object_type, object_id, issue_id, action, created_time) "
+    "SELECT project_id, 'issue', id, NULL, 'created', %s FROM projects_issue ORDER BY id",
+    "INSERT INTO projects_changelogentry (project_id, object_type, object_id, issue_id, action, created_time) "
+    "SELECT i.project_id, 'comment', c.id, c.issue_id, 'created', %s "
+    "FROM projects_comment c JOIN projects_issue i ON i.id = c.issue_id ORDER BY c.id",
+]
+
+
+def seed_change_log(apps, schema_editor):
+    now = schema_editor.connection.ops.adapt_datetimefield_value(timezone.now())
+    for statement in SEED_CHANGE_LOG:
+        schema_editor.execute(statement, [now])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0014_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_id', models.IntegerField()),
+                ('object_type', models.CharField(choices=[('project', 'project'), ('contributor', 'contributor'), ('issue', 'issue'), ('comment', 'comment')], max_length=12)),
+                ('object_id', models.IntegerField()),
+                ('issue_id', models.IntegerField(null=True)),
+                ('action', models.CharField(choices=[('created', 'created'), ('updated', 'updated'), ('deleted', 'deleted')], max_length=8)),
+                ('created_time', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['project_id', 'id'], name='change_project_seq_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changelogentry',
+            index=models.Index(fields=['created_time'], name='change_created_idx'),
+        ),
+        migrations.RunPython(seed_change_log, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,26 @@
 from django.db import models
+from django.utils import timezone
+
 from SoftDesk import settings
-from constants import PROJECT_TYPES, CONTRIBUTOR_ROLES, ISSUE_TAGS, ISSUE_STATUSES, ISSUE_PRIORITIES
+from constants import PROJECT_TYPES, CONTRIBUTOR_ROLES, ISSUE_TAGS, ISSUE_STATUSES, ISSUE_PRIORITIES, \
+    ISSUE_PRIORITY_RANKS, CHANGE_OBJECT_TYPES, CHANGE_ACTIONS
+
+
+class CounterFieldsMixin:
+    """
+    The denormalized counters are only written by F() updates (see lib_counters):
+    saving an instance loaded earlier must not write their stale values back
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.counter_fields]
+        super().save(*args, **kwargs)
 
 
-class Project(models.Model):
+class Project(CounterFieldsMixin, models.Model):
     """
     Model for a project
     """
@@ -13,6 +30,16 @@ class Project(models.Model):
     author = models.ForeignKey(
         to=settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+    issue_count = models.IntegerField(default=0, editable=False)
+    open_issue_count = models.IntegerField(default=0, editable=False)
+
+    counter_fields = ('issue_count', 'open_issue_count')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title', 'description', 'type'], name='project_identity_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.type}) by {self.author}"
@@ -28,6 +55,18 @@ class Contributor(models.Model):
                              on_delete=models.CASCADE)
     project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
     role = models.CharField(max_length=10, choices=CONTRIBUTOR_ROLES)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'project'], name='unique_project_contributor'),
+            models.UniqueConstraint(fields=['project'], condition=models.Q(role='Manager'),
+                                    name='unique_project_manager'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'role'], name='contributor_project_role_idx'),
+            models.Index(fields=['user', 'role'], name='contributor_user_role_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user}: {self.role} for {self.project}'
@@ -35,7 +74,7 @@ class Contributor(models.Model):
     objects = models.Manager()
 
 
-class Issue(models.Model):
+class Issue(CounterFieldsMixin, models.Model):
     """
     Model for the project-related issues
     """
@@ -43,6 +82,7 @@ class Issue(models.Model):
     description = models.CharField(max_length=1024)
     tag = models.CharField(max_length=10, choices=ISSUE_TAGS)
     priority = models.CharField(max_length=10, choices=ISSUE_PRIORITIES)
+    priority_rank = models.PositiveSmallIntegerField(default=0, editable=False)
     project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=ISSUE_STATUSES)
     author = models.ForeignKey(to=settings.AUTH_USER_MODEL, related_name='issue_author',
@@ -50,10 +90,35 @@ class Issue(models.Model):
     assignee = models.ForeignKey(to=settings.AUTH_USER_MODEL, related_name='issue_assignee',
                                  blank=True, null=True, on_delete=models.CASCADE)
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+    comment_count = models.IntegerField(default=0, editable=False)
+    # last change of the issue or of one of its comments
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    counter_fields = ('comment_count',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'created_time', 'id'], name='issue_project_page_idx'),
+            models.Index(fields=['project', 'updated_time'], name='issue_project_updated_idx'),
+            # list filters: each one narrows the project's issues and keeps them in page order
+            models.Index(fields=['project', 'status', 'created_time', 'id'], name='issue_project_status_idx'),
+            models.Index(fields=['project', 'tag', 'created_time', 'id'], name='issue_project_tag_idx'),
+            models.Index(fields=['project', 'assignee', 'created_time', 'id'], name='issue_project_assignee_idx'),
+            models.Index(fields=['project', 'author', 'created_time', 'id'], name='issue_project_author_idx'),
+            models.Index(fields=['project', 'priority_rank', 'id'], name='issue_project_priority_idx'),
+            models.Index(fields=['project', 'last_activity_at', 'id'], name='issue_project_activity_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title} ({self.tag}: {self.priority}) by {self.author} for Project "{self.project.title}"'
 
+    def save(self, *args, **kwargs):
+        self.priority_rank = ISSUE_PRIORITY_RANKS[self.priority]
+        if not self._state.adding:
+            self.last_activity_at = timezone.now()
+        super().save(*args, **kwargs)
+
     objects = models.Manager()
 
 
@@ -66,8 +131,58 @@ class Comment(models.Model):
                                on_delete=models.CASCADE)
     issue = models.ForeignKey(to=Issue, on_delete=models.CASCADE)
     created_time = models.DateTimeField(auto_now_add=True)
+    updated_time = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['issue', 'created_time', 'id'], name='comment_issue_page_idx'),
+            models.Index(fields=['issue', 'updated_time'], name='comment_issue_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.description} by {self.author} for issue "{self.issue.title}"'
 
     objects = models.Manager()
+
+
+class IssueSummary(models.Model):
+    """
+    Materialized count of the issues of a project per status, priority, tag and assignee,
+    maintained by database triggers on every issue write (see migration 0013)
+    """
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=ISSUE_STATUSES)
+    priority = models.CharField(max_length=10, choices=ISSUE_PRIORITIES)
+    tag = models.CharField(max_length=10, choices=ISSUE_TAGS)
+    assignee_id = models.IntegerField()  # 0 when unassigned, so that the unique constraint applies
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'status', 'priority', 'tag', 'assignee_id'],
+                                    name='unique_issue_summary'),
+        ]
+
+    objects = models.Manager()
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of the writes on a project, read by the clients to sync their copy incrementally.
+    The ID is the sequence number of the change.
+    Entries are only removed by compaction, the oldest first: they outlive a deleted project until then.
+    """
+    project_id = models.IntegerField()
+    object_type = models.CharField(max_length=12, choices=CHANGE_OBJECT_TYPES)
+    object_id = models.IntegerField()
+    issue_id = models.IntegerField(null=True)  # issue of a changed comment
+    action = models.CharField(max_length=8, choices=CHANGE_ACTIONS)
+    created_time = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project_id', 'id'], name='change_project_seq_idx'),
+            models.Index(fields=['created_time'], name='change_created_idx'),
+        ]
+
+    objects = models.Manager()
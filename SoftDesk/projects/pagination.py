@@ -0,0 +1,146 @@
+"""
+Keyset (cursor) pagination for the list endpoints of the projects app
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as Base64Error
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from SoftDesk import settings
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginates a queryset on the values of its ordering fields instead of an offset,
+    so that the cost of a page does not depend on how deep the client pages.
+    The ordering must end with a unique field to be stable.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = settings.MAX_PAGE_SIZE
+    ordering = ('created_time', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse, values = cursor if cursor else (False, None)
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        self.has_next = has_more if not reverse else True
+        self.has_previous = cursor is not None if not reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        """
+        data is the dict holding the serialized page under the endpoint's own key
+        """
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            *data.items()
+        ]))
+
+    def get_page_size(self, request) -> int:
+        try:
+            return _positive_int(request.query_params[self.page_size_query_param],
+                                 strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self.page[0])
+
+    def encode_cursor(self, reverse: bool, row) -> str:
+        values = [self._row_value(row, field) for field, _ in self._fields()]
+        token = json.dumps({'o': list(self.ordering), 'r': int(reverse), 'v': values}, separators=(',', ':'))
+        encoded = urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        """
+        Reads the cursor back, which must have been made for the same ordering,
+        each value being converted by the model field it is compared to
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            token = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            ordering, reverse, values = token['o'], bool(token['r']), token['v']
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, Base64Error):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != list(self.ordering) or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [model._meta.get_field(field).to_python(value)
+                      for (field, _), value in zip(self._fields(), values)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def _fields(self) -> list[tuple[str, bool]]:
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    def _order_by(self, reverse: bool) -> list[str]:
+        return [f"{'-' if descending != reverse else ''}{field}" for field, descending in self._fields()]
+
+    def _keyset_filter(self, values: list, reverse: bool) -> Q:
+        """
+        Builds the lexicographic "row comes after the cursor" condition:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        """
+        fields = self._fields()
+        keyset = Q()
+        for index, (field, descending) in enumerate(fields):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition = Q(**{f'{field}__{lookup}': values[index]})
+            for previous_index, (previous_field, _) in enumerate(fields[:index]):
+                condition &= Q(**{previous_field: values[previous_index]})
+            keyset |= condition
+        return keyset
+
+    @staticmethod
+    def _row_value(row, field: str):
+        value = row[field] if isinstance(row, dict) else getattr(row, field)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+
+class ContributorCursorPagination(KeysetCursorPagination):
+    """
+    Contributors have no creation date, they are paged on their ID only
+    """
+    ordering = ('id',)
@@ -36,7 +36,7 @@ class IssuePermissions(permissions.DjangoModelPermissions):
         if request.method in [SAFE_METHODS, 'POST']:
             return True
         else:
-            return lib_permissions.is_issue_author(request, view)
+            return lib_permissions.is_issue_author(request, view, obj)
 
 
 class CommentPermissions(permissions.DjangoModelPermissions):
@@ -47,4 +47,4 @@ class CommentPermissions(permissions.DjangoModelPermissions):
         if request.method in [SAFE_METHODS, 'POST']:
             return True
         else:
-            return lib_permissions.is_comment_author(request, view)
+            return lib_permissions.is_comment_author(request, view, obj)
@@ -1,17 +1,56 @@
 import logging
+from typing import Callable, Optional
 
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
-from projects.libs import lib_projects
+from SoftDesk import settings
+from constants import CONTRIBUTOR_ROLES, ISSUE_STATUSES, ISSUE_PRIORITIES, ISSUE_TAGS
+from projects.libs import lib_changes, lib_counters, lib_permissions, lib_projects, lib_response_cache
 from projects.models import Project, Issue, Comment, Contributor
+from users.serializers import UserSummarySerializer
 
 logger = logging.getLogger('projects_app')
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ValuesSerializerMixin:
+    """
+    Read-only fast path of the list endpoints: the rows are read with .values()
+    and turned into the serializer's representation through a field mapping computed once per class,
+    instead of running every field on model instances
+    """
+    # fields whose representation is the database value itself
+    identity_fields = (serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+                       serializers.PrimaryKeyRelatedField)
+
+    @classmethod
+    def values_mapping(cls) -> list[tuple[str, Optional[Callable]]]:
+        if '_values_mapping' not in cls.__dict__:
+            cls._values_mapping = [(name, None if isinstance(field, cls.identity_fields) else field.to_representation)
+                                   for name, field in cls().fields.items() if not field.write_only]
+        return cls._values_mapping
+
+    @classmethod
+    def values_queryset(cls, queryset, ordering=()):
+        """
+        Selects the serialized fields, and the ordering fields the cursor pagination reads on the rows
+        """
+        fields = [name for name, _ in cls.values_mapping()]
+        return queryset.values(*fields, *[field.lstrip('-') for field in ordering if field.lstrip('-') not in fields])
+
+    @classmethod
+    def values_data(cls, rows) -> list[dict]:
+        mapping = cls.values_mapping()
+        return [{name: row[name] if convert is None or row[name] is None else convert(row[name])
+                 for name, convert in mapping}
+                for row in rows]
+
+
+class ProjectSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Project
-        fields = ['id', 'title', 'description', 'type', 'author', 'created_time']
+        fields = ['id', 'title', 'description', 'type', 'author', 'created_time', 'issue_count', 'open_issue_count']
         read_only_fields = ['author', 'created_time']
 
     def save(self, author) -> Project:
@@ -19,7 +58,7 @@ class ProjectSerializer(serializers.ModelSerializer):
             title=self.validated_data['title'],
             description=self.validated_data['description'],
             type=self.validated_data['type'],
-            author=author
+            author_id=author.id
         )
         if lib_projects.already_existing_project(project):
             raise serializers.ValidationError({'already_existing_project': 'Exact same project already exists'})
@@ -27,8 +66,14 @@ class ProjectSerializer(serializers.ModelSerializer):
         project.save()
         return project
 
+    def update(self, instance, validated_data) -> Project:
+        with transaction.atomic():
+            project = super().update(instance, validated_data)
+            lib_changes.log_change(project.id, 'project', lib_changes.UPDATED, project.id)
+        return project
+
 
-class ContributorSerializer(serializers.ModelSerializer):
+class ContributorSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Contributor
         fields = ['id', 'user', 'project', 'role']
@@ -41,33 +86,66 @@ class ContributorSerializer(serializers.ModelSerializer):
             role=self.validated_data['role'],
         )
 
-        errors = {}
-        has_manager = lib_projects.has_manager(contributor.project)
-        already_has_role = lib_projects.already_has_role(contributor)
-        already_registered_contributors = lib_projects.already_registered_contributors(contributor)
+        [errors] = lib_projects.contributors_errors(project.id, [(contributor.user.id, contributor.role)])
+        if errors:
+            raise serializers.ValidationError({'errors': errors})
 
-        if contributor.role == 'Creator':
-            errors['creator'] = 'Project creator cannot be added manually'
-        if has_manager and contributor.role == 'Manager':
-            errors['has_manager'] = 'Project already has a registered Manager'
-        if already_has_role:
-            errors['already_has_role'] = 'User already has another role in the project'
-        if already_registered_contributors:
-            errors['already_contributor'] = 'User already registered as contributor'
+        try:
+            with transaction.atomic():
+                contributor.save()
+                lib_changes.log_change(project.id, 'contributor', lib_changes.CREATED, contributor.id)
+        except IntegrityError:
+            raise serializers.ValidationError({'errors': lib_projects.CONTRIBUTORS_CONFLICT})
+        return contributor
 
+    def update(self, instance, validated_data) -> Contributor:
+        errors = lib_projects.role_change_errors(instance, validated_data.get('role', instance.role))
         if errors:
             raise serializers.ValidationError({'errors': errors})
 
-        contributor.save()
+        previous_user_id = instance.user_id
+        try:
+            with transaction.atomic():
+                contributor = super().update(instance, validated_data)
+                lib_changes.log_change(contributor.project_id, 'contributor', lib_changes.UPDATED, contributor.id)
+                if contributor.user_id != previous_user_id:
+                    # the save only invalidates the role of the new user
+                    lib_permissions.invalidate_project_roles_on_commit(contributor.project_id, [previous_user_id])
+        except IntegrityError:
+            raise serializers.ValidationError({'errors': lib_projects.CONTRIBUTORS_CONFLICT})
         return contributor
 
 
-class IssueSerializer(serializers.ModelSerializer):
+class ContributorBulkSerializer(serializers.Serializer):
+    """
+    Contributor to be added by the bulk endpoint: users are checked all at once by the view
+    """
+    user = serializers.IntegerField()
+    role = serializers.ChoiceField(choices=CONTRIBUTOR_ROLES)
+
+
+class IssueSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Issue
-        fields = ['id', 'title', 'description', 'tag', 'priority', 'project', 'status', 'author', 'assignee']
+        fields = ['id', 'title', 'description', 'tag', 'priority', 'project', 'status', 'author', 'assignee',
+                  'comment_count', 'last_activity_at']
         read_only_fields = ['project', 'author']
 
+    def to_representation(self, instance):
+        """
+        Embeds the related objects listed in the 'expand' context instead of their IDs
+        """
+        data = super().to_representation(instance)
+        expand = self.context.get('expand', ())
+        for field in ('author', 'assignee'):
+            if field in expand and data[field] is not None:
+                data[field] = UserSummarySerializer(getattr(instance, field)).data
+        if 'project' in expand:
+            data['project'] = ProjectSerializer(instance.project).data
+        if 'comments' in expand:
+            data['comments'] = CommentSerializer(instance.comment_set.all(), many=True).data
+        return data
+
     def save(self, user, project) -> Issue:
         issue = Issue(
             title=self.validated_data['title'],
@@ -76,30 +154,160 @@ class IssueSerializer(serializers.ModelSerializer):
             priority=self.validated_data['priority'],
             status=self.validated_data['status'],
             assignee=self.validated_data['assignee'],
-            author=user,
+            author_id=user.id,
             project=project,
         )
 
         #  mettre des verifs ici si besoin
 
-        issue.save()
+        with transaction.atomic():
+            issue.save()
+            lib_counters.count_issues(project.id, 1, lib_counters.is_open(issue.status))
+            lib_changes.log_change(project.id, 'issue', lib_changes.CREATED, issue.id)
+        return issue
+
+    def update(self, instance, validated_data) -> Issue:
+        previous_status = instance.status
+        with transaction.atomic():
+            issue = super().update(instance, validated_data)
+            reopened = lib_counters.is_open(issue.status) - lib_counters.is_open(previous_status)
+            lib_counters.count_issues(issue.project_id, 0, reopened)
+            lib_changes.log_change(issue.project_id, 'issue', lib_changes.UPDATED, issue.id)
         return issue
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class IssueBulkSerializer(IssueSerializer):
+    """
+    Issue to be imported by the bulk endpoint: assignees are checked all at once by the view
+    """
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+
+
+class ExpandQuerySerializer(serializers.Serializer):
+    """
+    ?expand= query parameter: comma separated related objects to embed in the response
+    """
+    expandable = ()
+    expand = serializers.CharField(required=False, default='')
+
+    def validate_expand(self, value) -> set[str]:
+        expand = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = expand.difference(self.expandable)
+        if unknown:
+            raise serializers.ValidationError(f'{sorted(unknown)}: cannot be expanded, '
+                                              f'expandable: {list(self.expandable)}')
+        return expand
+
+
+class IssueExpandQuerySerializer(ExpandQuerySerializer):
+    expandable = ('author', 'assignee', 'project', 'comments')
+
+
+class CommentExpandQuerySerializer(ExpandQuerySerializer):
+    expandable = ('author', 'issue')
+
+
+class IssueListQuerySerializer(IssueExpandQuerySerializer):
+    """
+    Query parameters of the issue list
+    """
+    status = serializers.ChoiceField(choices=ISSUE_STATUSES, required=False)
+    priority = serializers.ChoiceField(choices=ISSUE_PRIORITIES, required=False)
+    tag = serializers.ChoiceField(choices=ISSUE_TAGS, required=False)
+    assignee = serializers.IntegerField(required=False)
+    author = serializers.IntegerField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    ordering = serializers.ChoiceField(choices=list(lib_projects.ISSUE_ORDERINGS), required=False)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the project search
+    """
+    q = serializers.CharField(max_length=256)
+    page_size = serializers.IntegerField(min_value=1, max_value=settings.MAX_PAGE_SIZE,
+                                         default=api_settings.PAGE_SIZE)
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the change feed: last sequence number read by the client (0 at first)
+    """
+    since = serializers.IntegerField(min_value=0, default=0)
+    page_size = serializers.IntegerField(min_value=1, max_value=settings.MAX_PAGE_SIZE,
+                                         default=api_settings.PAGE_SIZE)
+
+
+class IssueFilterSerializer(serializers.Serializer):
+    """
+    Selection of issues for the bulk update
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    tag = serializers.ChoiceField(choices=ISSUE_TAGS, required=False)
+    priority = serializers.ChoiceField(choices=ISSUE_PRIORITIES, required=False)
+    status = serializers.ChoiceField(choices=ISSUE_STATUSES, required=False)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+
+
+class IssueChangesSerializer(serializers.Serializer):
+    """
+    Fields the bulk update can change
+    """
+    priority = serializers.ChoiceField(choices=ISSUE_PRIORITIES, required=False)
+    status = serializers.ChoiceField(choices=ISSUE_STATUSES, required=False)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError('At least one of priority, status or assignee must be changed')
+        return attrs
+
+
+class IssueBulkUpdateSerializer(serializers.Serializer):
+    filter = IssueFilterSerializer(required=False)
+    changes = IssueChangesSerializer()
+
+
+class CommentSerializer(ValuesSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ['id', 'description', 'author', 'issue']
         read_only_fields = ['issue', 'author']
 
+    def to_representation(self, instance):
+        """
+        Embeds the related objects listed in the 'expand' context instead of their IDs
+        """
+        data = super().to_representation(instance)
+        expand = self.context.get('expand', ())
+        if 'author' in expand:
+            data['author'] = UserSummarySerializer(instance.author).data
+        if 'issue' in expand:
+            data['issue'] = IssueSerializer(instance.issue).data
+        return data
+
     def save(self, user, issue) -> Comment:
         comment = Comment(
             description=self.validated_data['description'],
-            author=user,
+            author_id=user.id,
             issue=issue,
         )
 
         #  mettre des verifs ici si besoin
 
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            lib_counters.count_comments(issue.project_id, issue.id, 1)
+            lib_changes.log_change(issue.project_id, 'comment', lib_changes.CREATED, comment.id, issue.id)
+            lib_response_cache.bump_project_generation_on_commit(issue.project_id)
+        return comment
+
+    def update(self, instance, validated_data) -> Comment:
+        with transaction.atomic():
+            comment = super().update(instance, validated_data)
+            lib_counters.touch_issue(comment.issue.project_id, comment.issue_id)
+            lib_changes.log_change(comment.issue.project_id, 'comment', lib_changes.UPDATED, comment.id,
+                                   comment.issue_id)
+            lib_response_cache.bump_project_generation_on_commit(comment.issue.project_id)
         return comment
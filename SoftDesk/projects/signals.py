@@ -0,0 +1,35 @@
+"""
+Signal receivers keeping the caches of the projects app in line with the database.
+Comments have none: their pages are invalidated by the comment write paths, which know the project,
+and the comments of a deleted issue are deleted by a single query.
+"""
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from projects.libs import lib_permissions, lib_response_cache
+from projects.models import Project, Contributor, Issue
+
+
+@receiver(post_save, sender=Contributor)
+@receiver(post_delete, sender=Contributor)
+def invalidate_contributor_role(sender, instance, **kwargs):
+    """
+    A contributor was added, had their role changed or was removed from a project
+    """
+    lib_permissions.invalidate_project_roles_on_commit(instance.project_id, [instance.user_id])
+    lib_response_cache.bump_project_generation_on_commit(instance.project_id)
+
+
+@receiver(pre_delete, sender=Project)
+def invalidate_project_roles(sender, instance, **kwargs):
+    """
+    Connected before the deletion, while the contributors of the project can still be listed
+    """
+    user_ids = Contributor.objects.filter(project=instance).values_list('user_id', flat=True)
+    lib_permissions.invalidate_project_roles_on_commit(instance.id, user_ids)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def invalidate_issue_pages(sender, instance, **kwargs):
+    lib_response_cache.bump_project_generation_on_commit(instance.project_id)
@@ -1 +1,673 @@
-# Create your tests here.
+"""
+Tests of the projects app
+"""
+import asyncio
+import importlib
+import io
+import json
+import threading
+from unittest import mock
+from urllib.parse import quote
+
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.db.backends.utils import CursorWrapper
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches
+from rest_framework_jwt.serializers import jwt_encode_handler, jwt_payload_handler
+
+from SoftDesk import benchmarks, settings
+from SoftDesk.async_views import StreamingASGIHandler
+from SoftDesk.db_routers import PrimaryReplicaRouter, replica_reads
+from SoftDesk.middleware import primary_pin_key
+from projects.libs import lib_benchmarks, lib_projects, lib_response_cache, lib_search, lib_stats
+from projects.models import ChangeLogEntry, Issue, IssueSummary
+from users.authentication import _cached_users
+from users.models import CustomUser
+
+# the throttle counters, memberships and page generations of a test must not leak into the next one
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ApiTestMixin:
+    """
+    Users with their tokens and a project created through the API, as a client would
+    """
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        _cached_users.clear()
+        self.alice = self.create_user('alice')
+        self.bob = self.create_user('bob')
+        self.client = Client(HTTP_AUTHORIZATION=self.authorization(self.alice))
+        self.project_id = self.post('/projects/', {'title': 'P', 'description': 'd', 'type': 'Back-End'})['id']
+        self.post(f'/projects/{self.project_id}/users/', {'user': self.bob.id, 'role': 'Author'})
+
+    @staticmethod
+    def create_user(username: str) -> CustomUser:
+        return CustomUser.objects.create_user(username, f'{username}@softdesk.io', 'pw12345!',
+                                              first_name=username, last_name='test')
+
+    @staticmethod
+    def authorization(user: CustomUser) -> str:
+        return f"Bearer {jwt_encode_handler(jwt_payload_handler(user))}"
+
+    def client_for(self, user: CustomUser) -> Client:
+        return Client(HTTP_AUTHORIZATION=self.authorization(user))
+
+    def request(self, method: str, url: str, data: dict = None, status_code: int = 200):
+        if data is None:
+            response = getattr(self.client, method)(url)
+        else:
+            response = getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, status_code, response.content)
+        return response
+
+    def post(self, url: str, data: dict) -> dict:
+        return self.request('post', url, data, 201).json()
+
+    def assertQueries(self, budget: int, method: str, url: str, data: dict = None, status_code: int = 200):
+        with self.assertNumQueries(budget):
+            return self.request(method, url, data, status_code)
+
+    def create_issues(self, number: int) -> list:
+        return [self.post(f'/projects/{self.project_id}/issues/',
+                          {'title': f'issue {index}', 'description': 'd', 'tag': 'Bug', 'priority': 'Low',
+                           'status': 'Todo', 'assignee': self.bob.id})['id']
+                for index in range(number)]
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryBudgetTests(ApiTestMixin, TestCase):
+    """
+    Number of queries of each endpoint: a lazy load of a related object (N+1) exceeds it.
+    The issues and comments are written by several users, so that a lazy load happens on more than one row.
+    """
+    def setUp(self):
+        super().setUp()
+        self.carol = self.create_user('carol')
+        self.issue_ids = self.create_issues(3)
+        self.issue_id = self.issue_ids[0]
+        alice_client, self.client = self.client, Client(HTTP_AUTHORIZATION=self.authorization(self.bob))
+        self.comment_ids = [self.post(f'/projects/{self.project_id}/issues/{issue_id}/comments/',
+                                      {'description': 'c'})['id'] for issue_id in self.issue_ids]
+        self.client = alice_client
+        self.post(f'/projects/{self.project_id}/issues/{self.issue_id}/comments/', {'description': 'c'})
+
+    def test_project_endpoints(self):
+        project_url = f'/projects/{self.project_id}'
+        self.assertQueries(2, 'get', '/projects/')
+        self.assertQueries(7, 'post', '/projects/', {'title': 'Q', 'description': 'd', 'type': 'iOS'}, 201)
+        self.assertQueries(1, 'get', project_url)
+        self.assertQueries(5, 'put', project_url, {'title': 'P2'}, 204)
+        self.assertQueries(14, 'delete', project_url, status_code=204)
+
+    def test_contributor_endpoints(self):
+        contributors_url = f'/projects/{self.project_id}/users/'
+        self.assertQueries(1, 'get', contributors_url)
+        self.assertQueries(7, 'post', contributors_url, {'user': self.carol.id, 'role': 'Author'}, 201)
+        self.assertQueries(1, 'get', f'{contributors_url}{self.carol.id}')
+        self.assertQueries(6, 'put', f'{contributors_url}{self.carol.id}', {'role': 'Manager'}, 204)
+        self.assertQueries(5, 'delete', f'{contributors_url}{self.carol.id}', status_code=204)
+
+    def test_issue_endpoints(self):
+        issues_url = f'/projects/{self.project_id}/issues/'
+        self.assertQueries(1, 'get', issues_url)
+        self.assertQueries(8, 'post', issues_url, {'title': 't', 'description': 'd', 'tag': 'Bug', 'priority': 'Low',
+                                                   'status': 'Todo', 'assignee': self.bob.id}, 201)
+        self.assertQueries(1, 'get', f'{issues_url}{self.issue_id}')
+        self.assertQueries(7, 'put', f'{issues_url}{self.issue_id}', {'status': 'Closed'}, 204)
+        self.assertQueries(8, 'delete', f'{issues_url}{self.issue_id}', status_code=204)
+
+    def test_comment_endpoints(self):
+        comments_url = f'/projects/{self.project_id}/issues/{self.issue_id}/comments/'
+        comment_url = f'{comments_url}{self.comment_ids[0]}'
+        self.assertQueries(2, 'get', comments_url)
+        self.assertQueries(7, 'post', comments_url, {'description': 'd'}, 201)
+        self.assertQueries(1, 'get', comment_url)
+        self.client = Client(HTTP_AUTHORIZATION=self.authorization(self.bob))
+        self.assertQueries(7, 'put', comment_url, {'description': 'e'}, 204)
+        self.assertQueries(7, 'delete', comment_url, status_code=204)
+
+
+class IndexPlanTests(TestCase):
+    """
+    The hot queries search their index rather than scan their table (benchmark_queries times them)
+    """
+    def test_hot_queries_search_their_index(self):
+        project_id = lib_benchmarks.seed_project(200, users=5, comments_per_issue=1)
+        for name, (queryset, index) in lib_benchmarks.hot_queries(project_id).items():
+            plan = benchmarks.query_plan(queryset)
+            self.assertIn(index, plan, name)
+            self.assertNotIn('TEMP B-TREE', plan, name)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IssueFilterTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.issue_ids = {}
+        for title, priority, issue_status, tag, assignee in (('low', 'Low', 'Todo', 'Bug', self.bob),
+                                                             ('high', 'High', 'Closed', 'Task', self.alice),
+                                                             ('medium', 'Medium', 'Todo', 'Bug', self.alice)):
+            self.issue_ids[title] = self.post(f'/projects/{self.project_id}/issues/', {
+                'title': title, 'description': 'd', 'tag': tag, 'priority': priority, 'status': issue_status,
+                'assignee': assignee.id})['id']
+
+    def titles(self, query: str) -> list:
+        return [issue['title'] for issue in self.request('get', f'/projects/{self.project_id}/issues/?{query}')
+                .json()['issues']]
+
+    def test_filters(self):
+        self.assertEqual(self.titles('status=Todo'), ['low', 'medium'])
+        self.assertEqual(self.titles('priority=High'), ['high'])
+        self.assertEqual(self.titles('tag=Bug&assignee=%s' % self.alice.id), ['medium'])
+        self.assertEqual(self.titles('author=%s' % self.alice.id), ['low', 'high', 'medium'])
+        created = Issue.objects.get(pk=self.issue_ids['high']).created_time.isoformat()
+        self.assertEqual(self.titles(f'created_after={quote(created)}'), ['high', 'medium'])
+        self.assertEqual(self.titles(f'created_before={quote(created)}'), ['low'])
+        self.request('get', f'/projects/{self.project_id}/issues/?author={self.bob.id}', status_code=404)
+        self.request('get', f'/projects/{self.project_id}/issues/?priority=Urgent', status_code=400)
+
+    def test_priority_ordering_by_rank(self):
+        self.assertEqual(self.titles('ordering=priority'), ['low', 'medium', 'high'])
+        self.assertEqual(self.titles('ordering=-priority'), ['high', 'medium', 'low'])
+        self.assertEqual(self.titles('ordering=-priority&status=Todo'), ['medium', 'low'])
+
+    def test_filters_search_an_index(self):
+        """ the first page of each filter in the default order reads an index, in the order of the page """
+        project_id = lib_benchmarks.seed_project(300, users=5)
+        for name, filters in lib_benchmarks.issue_list_filters(project_id).items():
+            plan = benchmarks.query_plan(lib_benchmarks.issue_page(project_id, filters, 'created_time', 10))
+            self.assertRegex(plan, r'^SEARCH projects_issue USING INDEX issue_project_\w+_idx', name)
+            self.assertNotIn('TEMP B-TREE', plan, name)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SearchTests(ApiTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.issues_url = f'/projects/{self.project_id}/issues/'
+        self.login_issue_id, self.export_issue_id = (
+            self.post(self.issues_url, {'title': title, 'description': description, 'tag': 'Bug', 'priority': 'Low',
+                                        'status': 'Todo', 'assignee': self.bob.id})['id']
+            for title, description in (('Login page crash', 'the page crashes after a timeout'),
+                                       ('Export fails', 'the CSV export is empty')))
+        self.comment_id = self.post(f'{self.issues_url}{self.export_issue_id}/comments/',
+                                    {'description': 'only since the login changes'})['id']
+
+    def search(self, text: str) -> list:
+        return self.request('get', f'/projects/{self.project_id}/search/?q={quote(text)}').json()['results']
+
+    def test_ranking_and_highlights(self):
+        results = self.search('login')
+        self.assertEqual([(result['type'], result['id']) for result in results],
+                         [('issue', self.login_issue_id), ('comment', self.comment_id)])  # the title weighs more
+        self.assertEqual(results[0]['title'], '<mark>Login</mark> page crash')
+        self.assertEqual(results[1]['issue'], self.export_issue_id)
+        self.assertIn('<mark>login</mark>', results[1]['snippet'])
+        self.assertEqual([result['id'] for result in self.search('crash* timeout')], [self.login_issue_id])
+        self.assertEqual(self.search('login OR "export'), [])  # operators are searched as words
+
+    def test_index_follows_writes(self):
+        self.request('put', f'{self.issues_url}{self.login_issue_id}', {'title': 'Sign-in page crash'}, 204)
+        self.assertEqual([result['type'] for result in self.search('login')], ['comment'])
+        self.assertEqual([result['id'] for result in self.search('sign')], [self.login_issue_id])
+        self.request('delete', f'{self.issues_url}{self.export_issue_id}/comments/{self.comment_id}',
+                     status_code=204)
+        self.assertEqual(self.search('login'), [])
+
+        other_project_id = self.post('/projects/', {'title': 'Q', 'description': 'd', 'type': 'Back-End'})['id']
+        self.post(f'/projects/{other_project_id}/issues/', {'title': 'CSV export', 'description': 'd', 'tag': 'Bug',
+                                                            'priority': 'Low', 'status': 'Todo',
+                                                            'assignee': self.alice.id})
+        self.assertEqual([result['id'] for result in self.search('export')], [self.export_issue_id])
+
+    def test_rebuild(self):
+        before = self.search('the')
+        self.assertEqual(lib_search.rebuild_search_index(), 3)
+        self.assertEqual(self.search('the'), before)
+
+    def test_search_latency_command(self):
+        output = io.StringIO()
+        call_command('benchmark_search', documents=200, repeat=2, stdout=output)
+        self.assertIn('200 indexed documents', output.getvalue())
+        self.assertEqual(Issue.objects.count(), 2)  # the seeded documents were rolled back
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExpandQueryTests(ApiTestMixin, TestCase):
+    """
+    The expanded representations cost the same number of queries whatever the number of rows of the page,
+    the issues being assigned to and the comments written by several users
+    """
+    page_sizes = (2, 8)
+
+    def setUp(self):
+        super().setUp()
+        self.issue_ids = self.create_issues(10)
+        self.issue_id = self.issue_ids[0]
+        self.request('put', f'/projects/{self.project_id}/issues/{self.issue_ids[1]}', {'assignee': self.alice.id},
+                     status_code=204)
+        clients = [self.client, Client(HTTP_AUTHORIZATION=self.authorization(self.bob))]
+        self.comment_ids = []
+        for index in range(10):
+            self.client = clients[index % 2]
+            issue_id = self.issue_ids[index % 3]
+            self.comment_ids.append(self.post(f'/projects/{self.project_id}/issues/{issue_id}/comments/',
+                                              {'description': f'c{index}'})['id'])
+            self.client = clients[(index + 1) % 2]
+            self.post(f'/projects/{self.project_id}/issues/{self.issue_id}/comments/', {'description': f'd{index}'})
+        self.client = clients[0]
+
+    def assertPagesQueries(self, budget: int, url: str, list_name: str) -> list:
+        pages = []
+        for page_size in self.page_sizes:
+            with self.subTest(page_size=page_size):
+                response = self.assertQueries(budget, 'get', f'{url}&page_size={page_size}')
+                self.assertEqual(len(response.json()[list_name]), page_size)
+                pages.append(response.json()[list_name])
+        return pages
+
+    def test_issue_list_expand(self):
+        for issues in self.assertPagesQueries(2, f'/projects/{self.project_id}/issues/'
+                                                 f'?expand=author,assignee,project,comments', 'issues'):
+            self.assertEqual({issue['assignee']['username'] for issue in issues[:2]}, {'alice', 'bob'})
+            self.assertEqual(issues[0]['project']['id'], self.project_id)
+
+    def test_issue_retrieve_expand(self):
+        response = self.assertQueries(2, 'get', f'/projects/{self.project_id}/issues/{self.issue_id}'
+                                                f'?expand=author,assignee,project,comments')
+        self.assertEqual(len(response.json()['comments']), 14)
+        self.assertEqual(response.json()['author']['username'], 'alice')
+
+    def test_comment_list_expand(self):
+        for comments in self.assertPagesQueries(2, f'/projects/{self.project_id}/issues/{self.issue_id}/comments/'
+                                                   f'?expand=author,issue', 'comments'):
+            self.assertEqual({comment['author']['username'] for comment in comments}, {'alice', 'bob'})
+            self.assertEqual(comments[0]['issue']['id'], self.issue_id)
+
+    def test_comment_retrieve_expand(self):
+        response = self.assertQueries(1, 'get', f'/projects/{self.project_id}/issues/{self.issue_id}'
+                                                f'/comments/{self.comment_ids[0]}?expand=author,issue')
+        self.assertEqual(response.json()['issue']['id'], self.issue_id)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class IssueImportTests(ApiTestMixin, TestCase):
+    """
+    NDJSON is only parsed by the bulk import
+    """
+    def ndjson(self, *issues) -> str:
+        return ''.join(json.dumps({'title': title, 'description': 'd', 'tag': 'Bug', 'priority': 'Low',
+                                   'status': 'Todo', 'assignee': self.bob.id}) + '\n' for title in issues)
+
+    def test_ndjson_import(self):
+        response = self.client.post(f'/projects/{self.project_id}/issues/bulk/', self.ndjson('a', 'b'),
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['created'], 2)
+
+    def test_ndjson_refused_by_create(self):
+        response = self.client.post(f'/projects/{self.project_id}/issues/', self.ndjson('a'),
+                                    content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 415)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ContributorsErrorsTests(ApiTestMixin, TestCase):
+    def test_candidates_checked_with_one_query(self):
+        carol, dave, erin = (self.create_user(username) for username in ('carol', 'dave', 'erin'))
+        for index in range(10):  # not loaded, whatever the size of the project
+            self.post(f'/projects/{self.project_id}/users/',
+                      {'user': self.create_user(f'user{index}').id, 'role': 'Author'})
+        self.post(f'/projects/{self.project_id}/users/', {'user': carol.id, 'role': 'Manager'})
+        other_project_id = self.post('/projects/', {'title': 'Q', 'description': 'd', 'type': 'Back-End'})['id']
+        self.post(f'/projects/{other_project_id}/users/', {'user': dave.id, 'role': 'Author'})
+
+        with self.assertNumQueries(1):
+            errors = lib_projects.contributors_errors(self.project_id, [
+                (self.bob.id, 'Author'), (erin.id, 'Manager'), (dave.id, 'Author'), (erin.id, 'Creator'),
+            ])
+        self.assertEqual([sorted(candidate_errors) for candidate_errors in errors], [
+            ['already_contributor', 'already_has_role'],
+            ['has_manager'],
+            ['already_contributor'],
+            ['already_has_role', 'creator'],
+        ])
+        self.assertEqual(lib_projects.contributors_errors(other_project_id, [(erin.id, 'Manager')]), [{}])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ProjectStatsTests(ApiTestMixin, TestCase):
+    def assertSummaryMatchesIssues(self):
+        issues = Issue.objects.filter(project=self.project_id)
+        with self.assertNumQueries(1):
+            stats = lib_stats.project_stats(self.project_id)
+        expected = {status: 0 for status in stats['issues']['status']}
+        expected.update(issues.values_list('status').annotate(Count('id')).order_by())
+        self.assertEqual(stats['issues']['status'], expected)
+        self.assertEqual(stats['issues']['total'], issues.count())
+        self.assertEqual(stats['contributors']['role'], {'Creator': 1, 'Manager': 0, 'Author': 1})
+
+    def test_summary_follows_the_writes(self):
+        issue_ids = self.create_issues(3)
+        self.assertSummaryMatchesIssues()
+
+        url = f'/projects/{self.project_id}/issues/'
+        self.request('put', f'{url}{issue_ids[0]}', {'status': 'Closed', 'priority': 'High'},
+                     status_code=204)
+        Issue.objects.filter(id=issue_ids[1]).update(status='Handled', assignee=None)
+        self.assertSummaryMatchesIssues()
+
+        self.request('delete', f'{url}{issue_ids[2]}', status_code=204)
+        self.assertSummaryMatchesIssues()
+        self.assertEqual(lib_stats.rebuild_issue_summary(), IssueSummary.objects.count())
+        self.assertSummaryMatchesIssues()
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ChangeFeedTests(ApiTestMixin, TestCase):
+    def test_deleted_project_feed_is_gone(self):
+        url = f'/projects/{self.project_id}/changes/'
+        bob_client = self.client_for(self.bob)
+        last_seq = bob_client.get(url).json()['last_seq']
+
+        self.request('delete', f'/projects/{self.project_id}', status_code=204)
+
+        deleted_seq = ChangeLogEntry.objects.get(project_id=self.project_id, object_type='project',
+                                                 action='deleted').id
+        self.assertGreater(deleted_seq, last_seq)
+        for client in (self.client, bob_client):
+            response = client.get(f'{url}?since={last_seq}')
+            self.assertEqual(response.status_code, 410, response.content)
+            self.assertEqual(response.json()['last_seq'], deleted_seq)
+
+    def test_feed_of_other_projects_is_forbidden(self):
+        carol_client = self.client_for(self.create_user('carol'))
+        self.assertEqual(carol_client.get(f'/projects/{self.project_id}/changes/').status_code, 403)
+        self.assertEqual(carol_client.get(f'/projects/{self.project_id + 1}/changes/').status_code, 403)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MembershipCacheTests(ApiTestMixin, TransactionTestCase):
+    """
+    The cached roles follow the contributor writes once they are committed
+    """
+    def test_contributor_user_change_revokes_previous_user(self):
+        carol = self.create_user('carol')
+        self.create_issues(1)
+        issues_url = f'/projects/{self.project_id}/issues/'
+        bob_client = self.client_for(self.bob)
+        self.assertEqual(bob_client.get(issues_url).status_code, 200)  # caches the role of bob
+
+        self.request('put', f'/projects/{self.project_id}/users/{self.bob.id}', {'user': carol.id}, 204)
+
+        self.assertEqual(bob_client.get(issues_url).status_code, 403)
+        self.assertEqual(bob_client.post(issues_url, {'title': 't', 'description': 'd', 'tag': 'Bug', 'priority': 'Low',
+                                                      'status': 'Todo', 'assignee': carol.id}).status_code, 403)
+        self.assertEqual(self.client_for(carol).get(issues_url).status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ReadYourWritesTests(ApiTestMixin, TransactionTestCase):
+    """
+    A token client, which keeps no cookies, reads from the primary right after its own writes
+    """
+    def setUp(self):
+        super().setUp()
+        self.issue_id = self.create_issues(1)[0]
+        self.bob_client = self.client_for(self.bob)
+        self.reads = 0
+
+    def replica_flags(self) -> set:
+        """ Whether each read of a GET by bob was allowed on the replicas """
+        flags, db_for_read = set(), PrimaryReplicaRouter.db_for_read
+
+        def recording_db_for_read(router, model, **hints):
+            flags.add(replica_reads.get())
+            return db_for_read(router, model, **hints)
+        self.reads += 1  # a new page each time, so that none of them comes from the response cache
+        with mock.patch.object(PrimaryReplicaRouter, 'db_for_read', recording_db_for_read):
+            response = self.bob_client.get(f'/projects/{self.project_id}/issues/?read={self.reads}')
+        self.assertEqual(response.status_code, 200)
+        return flags
+
+    def test_bearer_client_reads_its_writes_from_primary(self):
+        self.assertEqual(self.replica_flags(), {True})
+
+        response = self.bob_client.post(f'/projects/{self.project_id}/issues/{self.issue_id}/comments/',
+                                        {'description': 'c'})
+        self.assertEqual(response.status_code, 201, response.content)
+        self.bob_client.cookies.clear()
+        self.assertEqual(self.replica_flags(), {False})
+
+        cache.delete(primary_pin_key(self.bob.id))  # the pin expired
+        self.assertEqual(self.replica_flags(), {True})
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalListTests(ApiTestMixin, TransactionTestCase):
+    """
+    The ETag of the issue and comment lists follows the writes to the project without querying the rows
+    """
+    def setUp(self):
+        super().setUp()
+        self.issue_id = self.create_issues(1)[0]
+        self.post(f'/projects/{self.project_id}/issues/{self.issue_id}/comments/', {'description': 'c'})
+
+    def assertNotModified(self, url: str, etag: str, budget: int):
+        with self.assertNumQueries(budget):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_issue_list_etag(self):
+        url = f'/projects/{self.project_id}/issues/'
+        etag = self.request('get', url)['ETag']
+        self.assertNotModified(url, etag, 0)
+        self.post(f'/projects/{self.project_id}/issues/{self.issue_id}/comments/', {'description': 'd'})
+        self.assertNotEqual(self.request('get', url)['ETag'], etag)  # the comment count of the issue changed
+
+    def test_comment_list_etag(self):
+        url = f'/projects/{self.project_id}/issues/{self.issue_id}/comments/'
+        etag = self.request('get', url)['ETag']
+        self.assertNotModified(url, etag, 1)  # the issue, checked to be in the project
+        self.post(url, {'description': 'd'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ResponseCacheTests(ApiTestMixin, TransactionTestCase):
+    """
+    Every write path makes the cached list pages of its project stale once committed
+    """
+    def setUp(self):
+        super().setUp()
+        self.clear_pages()
+        self.addCleanup(self.clear_pages)
+        self.issue_id, self.other_issue_id = self.create_issues(2)
+        self.comments_url = f'/projects/{self.project_id}/issues/{self.issue_id}/comments/'
+        self.comment_id = self.post(self.comments_url, {'description': 'c'})['id']
+        self.carol = self.create_user('carol')
+
+    @staticmethod
+    def clear_pages():
+        with lib_response_cache._pages_lock:
+            lib_response_cache._pages.clear()
+            lib_response_cache._pages_size = 0
+
+    def cache_status(self, url: str) -> str:
+        return self.request('get', url)['X-Cache']
+
+    def assertWriteRefreshes(self, method: str, url: str, data=None, status_code: int = 204):
+        list_urls = (f'/projects/{self.project_id}/issues/', self.comments_url)
+        for list_url in list_urls:
+            self.cache_status(list_url)
+            self.assertEqual(self.cache_status(list_url), 'HIT')
+        self.request(method, url, data, status_code)
+        for list_url in list_urls:
+            self.assertEqual(self.cache_status(list_url), 'MISS', f'{method} {url}: {list_url}')
+
+    def test_issue_writes(self):
+        issues_url = f'/projects/{self.project_id}/issues/'
+        self.assertWriteRefreshes('post', issues_url, {'title': 't', 'description': 'd', 'tag': 'Bug',
+                                                       'priority': 'Low', 'status': 'Todo',
+                                                       'assignee': self.bob.id}, 201)
+        self.assertWriteRefreshes('put', f'{issues_url}{self.issue_id}', {'title': 'renamed'})
+        self.assertWriteRefreshes('delete', f'{issues_url}{self.other_issue_id}')
+
+    def test_comment_writes(self):
+        self.assertWriteRefreshes('post', self.comments_url, {'description': 'd'}, 201)
+        self.assertWriteRefreshes('put', f'{self.comments_url}{self.comment_id}', {'description': 'e'})
+        self.assertWriteRefreshes('delete', f'{self.comments_url}{self.comment_id}')
+
+    def test_contributor_writes(self):
+        users_url = f'/projects/{self.project_id}/users/'
+        self.assertWriteRefreshes('post', users_url, {'user': self.carol.id, 'role': 'Author'}, 201)
+        self.assertWriteRefreshes('put', f'{users_url}{self.carol.id}', {'role': 'Manager'})
+        self.assertWriteRefreshes('delete', f'{users_url}{self.carol.id}')
+
+    def test_bulk_writes(self):
+        issues_url = f'/projects/{self.project_id}/issues/bulk/'
+        self.assertWriteRefreshes('post', issues_url, [{'title': 'b', 'description': 'd', 'tag': 'Bug',
+                                                        'priority': 'Low', 'status': 'Todo'}], 201)
+        self.assertWriteRefreshes('patch', issues_url, {'filter': {'ids': [self.issue_id]},
+                                                        'changes': {'status': 'Closed'}}, 200)
+        self.assertWriteRefreshes('post', f'/projects/{self.project_id}/users/bulk/',
+                                  [{'user': self.carol.id, 'role': 'Author'}], 201)
+
+    def test_project_deletion(self):
+        generation = lib_response_cache.project_generation(self.project_id)
+        self.request('delete', f'/projects/{self.project_id}', status_code=204)
+        self.assertNotEqual(lib_response_cache.project_generation(self.project_id), generation)
+
+    def test_pages_evicted_least_recently_used_first(self):
+        issues_url = f'/projects/{self.project_id}/issues/'
+        urls = [f'{issues_url}?page_size={page_size}' for page_size in (1, 2, 3)]
+        page_sizes = {}
+        for url in urls:
+            page_sizes[url] = len(self.request('get', url).content)
+        # room for the two largest pages only
+        max_bytes = page_sizes[urls[1]] + page_sizes[urls[2]]
+        evictions = lib_response_cache.response_cache_stats['evictions']
+        self.clear_pages()
+        with mock.patch.object(settings, 'RESPONSE_CACHE_MAX_BYTES', max_bytes):
+            self.cache_status(urls[0])
+            self.cache_status(urls[1])
+            self.assertEqual(self.cache_status(urls[0]), 'HIT')  # the first page is now the most recent
+            self.cache_status(urls[2])  # evicts the least recently used page, the second
+            self.assertLessEqual(lib_response_cache._pages_size, max_bytes)
+            self.assertEqual(lib_response_cache.response_cache_stats['evictions'], evictions + 1)
+            self.assertEqual(self.cache_status(urls[0]), 'HIT')
+            self.assertEqual(self.cache_status(urls[1]), 'MISS')
+
+
+@override_settings(CACHES=TEST_CACHES)
+class AsgiReadsTests(ApiTestMixin, TransactionTestCase):
+    """
+    Concurrent reads served through ASGI run their views in parallel, up to ASYNC_READ_CONCURRENCY of them.
+    Each query waits until the expected number of views run queries at the same time,
+    so the overlap is counted rather than inferred from durations.
+    """
+    requests = settings.ASYNC_READ_CONCURRENCY * 2
+    overlap_timeout = 5  # seconds a query waits for the others, only reached when the reads do not overlap
+
+    def setUp(self):
+        super().setUp()
+        self.create_issues(20)
+        self.addCleanup(self.serve_reads_async, settings.ASYNC_VIEWS)
+
+    @staticmethod
+    def serve_reads_async(enabled: bool):
+        # asgi_view reads the setting when the URLs are loaded,
+        # the root URLs are reloaded as well as their resolvers keep the patterns of the included ones
+        with mock.patch.object(settings, 'ASYNC_VIEWS', enabled):
+            importlib.reload(importlib.import_module('projects.urls'))
+        importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    def counted_queries(self, expected: int):
+        """
+        Counts the views running a query at the same time, each query waiting until expected of them do
+        """
+        execute, lock, all_running = CursorWrapper._execute, threading.Lock(), threading.Event()
+        self.running = self.peak = 0
+
+        def counted_execute(cursor, *args):
+            with lock:
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+                if self.running >= expected:
+                    all_running.set()
+            try:
+                if not all_running.wait(self.overlap_timeout):
+                    all_running.set()  # the reads do not overlap, the next queries need not wait as well
+                return execute(cursor, *args)
+            finally:
+                with lock:
+                    self.running -= 1
+        return mock.patch.object(CursorWrapper, '_execute', counted_execute)
+
+    def url(self, index: int) -> str:
+        # distinct pages, so that none of them comes from the response cache
+        return f'/projects/{self.project_id}/issues/?page_size={index % 20 + 1}&index={index}'
+
+    def test_asgi_serves_reads_in_parallel(self):
+        self.serve_reads_async(True)
+        async_client, authorization = AsyncClient(), self.authorization(self.alice)
+
+        async def read_all():
+            return await asyncio.gather(*[async_client.get(self.url(index), AUTHORIZATION=authorization)
+                                          for index in range(self.requests)])
+
+        with self.counted_queries(settings.ASYNC_READ_CONCURRENCY):
+            responses = asyncio.run(read_all())
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(self.peak, settings.ASYNC_READ_CONCURRENCY)
+
+    def test_wsgi_serves_reads_one_at_a_time(self):
+        self.serve_reads_async(False)
+        with self.counted_queries(1):
+            for index in range(4):
+                self.assertEqual(self.client.get(self.url(index)).status_code, 200)
+        self.assertEqual(self.peak, 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ExportTests(ApiTestMixin, TransactionTestCase):
+    """
+    The export streams the same content through WSGI and through ASGI,
+    where Django would iterate it on the event loop, without access to the database
+    """
+    def setUp(self):
+        super().setUp()
+        for issue_id in self.create_issues(3):
+            self.post(f'/projects/{self.project_id}/issues/{issue_id}/comments/', {'description': 'c'})
+
+    def asgi_get(self, path: str, query_string: bytes = b'') -> tuple:
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string,
+                 'headers': [(b'host', b'testserver'), (b'authorization', self.authorization(self.alice).encode())]}
+
+        async def get():
+            communicator = ApplicationCommunicator(StreamingASGIHandler(), scope)
+            await communicator.send_input({'type': 'http.request'})
+            start, body, more_body = await communicator.receive_output(), b'', True
+            while more_body:
+                message = await communicator.receive_output()
+                body += message.get('body', b'')
+                more_body = message.get('more_body', False)
+            return start['status'], body
+        return asyncio.run(get())
+
+    def test_export_through_asgi(self):
+        path = f'/projects/{self.project_id}/export/'
+        for query_string in (b'', b'format=csv'):
+            with self.subTest(query_string=query_string):
+                wsgi_response = self.client.get(f'{path}?{query_string.decode()}')
+                self.assertEqual(wsgi_response.status_code, 200)
+                status, body = self.asgi_get(path, query_string)
+                self.assertEqual(status, 200)
+                self.assertEqual(body, wsgi_response.getvalue())
+                self.assertEqual(body.count(b'"description":"c"' if not query_string else b'\r\ncomment,'), 3)
@@ -1,47 +1,68 @@
 from django.urls import path
+
+from SoftDesk.async_views import asgi_view
 from projects.views import ProjectModelViewSet, ContributorModelViewSet, IssueModelViewSet, CommentModelViewSet
 
 app_name = "projects"
 
 
 urlpatterns = [
-    path('', ProjectModelViewSet.as_view(
+    path('', asgi_view(ProjectModelViewSet.as_view(
         {
             'get': 'list',
             'post': 'create'
         }
-    )),
-    path('<int:id_project>', ProjectModelViewSet.as_view({
+    ))),
+    path('<int:id_project>', asgi_view(ProjectModelViewSet.as_view({
             'get': 'retrieve',
             'put': 'update',
             'delete': 'destroy'
-        })),
+        }))),
     path('<int:id_project>/users/', ContributorModelViewSet.as_view({
             'get': 'list',
             'post': 'create'
         })),
+    path('<int:id_project>/users/bulk/', ContributorModelViewSet.as_view({
+            'post': 'create_many'
+        })),
     path('<int:id_project>/users/<int:id_user>', ContributorModelViewSet.as_view({
             'get': 'retrieve',
             'put': 'update',
             'delete': 'destroy'
         })),
 
-    path('<int:id_project>/issues/', IssueModelViewSet.as_view({
+    path('<int:id_project>/issues/', asgi_view(IssueModelViewSet.as_view({
             'get': 'list',
             'post': 'create'
+        }))),
+    path('<int:id_project>/issues/bulk/', IssueModelViewSet.as_view({
+            'post': 'create_many',
+            'patch': 'update_many'
+        })),
+    path('<int:id_project>/export/', IssueModelViewSet.as_view({
+            'get': 'export'
+        })),
+    path('<int:id_project>/changes/', IssueModelViewSet.as_view({
+            'get': 'changes'
         })),
-    path('<int:id_project>/issues/<int:id_issue>', IssueModelViewSet.as_view({
+    path('<int:id_project>/stats/', IssueModelViewSet.as_view({
+            'get': 'stats'
+        })),
+    path('<int:id_project>/search/', IssueModelViewSet.as_view({
+            'get': 'search'
+        })),
+    path('<int:id_project>/issues/<int:id_issue>', asgi_view(IssueModelViewSet.as_view({
             'get': 'retrieve',
             'put': 'update',
             'delete': 'destroy'
-        })),
-    path('<int:id_project>/issues/<int:id_issue>/comments/', CommentModelViewSet.as_view({
+        }))),
+    path('<int:id_project>/issues/<int:id_issue>/comments/', asgi_view(CommentModelViewSet.as_view({
             'get': 'list',
             'post': 'create'
-        })),
-    path('<int:id_project>/issues/<int:id_issue>/comments/<int:id_comment>', CommentModelViewSet.as_view({
+        }))),
+    path('<int:id_project>/issues/<int:id_issue>/comments/<int:id_comment>', asgi_view(CommentModelViewSet.as_view({
             'get': 'retrieve',
             'put': 'update',
             'delete': 'destroy'
-        })),
+        }))),
 ]
@@ -3,25 +3,37 @@ import logging
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.generics import get_object_or_404
+from rest_framework.settings import api_settings
 from rest_framework.viewsets import ModelViewSet
 
-from django.shortcuts import get_list_or_404
+from django.db import transaction
+from django.http import Http404, StreamingHttpResponse
 
+from SoftDesk.middleware import ReadReplicaViewMixin
+from projects.exceptions import ProjectDeleted
 from projects.models import Project, Contributor, Issue, Comment
-from projects.libs import lib_projects
-from projects.serializers import ProjectSerializer, ContributorSerializer, IssueSerializer, CommentSerializer
+from projects.libs import lib_changes, lib_conditional, lib_counters, lib_export, lib_projects, \
+    lib_response_cache, lib_search, lib_stats
+from projects.pagination import KeysetCursorPagination, ContributorCursorPagination
+from projects.parsers import NDJSONParser
+from projects.renderers import NDJSONRenderer, CSVRenderer
+from projects.serializers import ProjectSerializer, ContributorSerializer, ContributorBulkSerializer, \
+    IssueSerializer, IssueBulkSerializer, IssueBulkUpdateSerializer, IssueListQuerySerializer, CommentSerializer, \
+    SearchQuerySerializer, ChangesQuerySerializer, IssueExpandQuerySerializer, CommentExpandQuerySerializer
 
 from projects.permissions import ProjectPermissions, ContributorPermissions, IssuePermissions, CommentPermissions
 
 logger = logging.getLogger('projects_app')
 
 
-class ProjectModelViewSet(ModelViewSet):
+class ProjectModelViewSet(ReadReplicaViewMixin, ModelViewSet):
     """
     Endpoint for Projects
     """
     permission_classes = (ProjectPermissions,)
+    throttle_scope = 'projects'
     serializer_class = ProjectSerializer
+    pagination_class = KeysetCursorPagination
     queryset = Project.objects.all()
 
     def list(self, request, *args, **kwargs):
@@ -29,11 +41,20 @@ class ProjectModelViewSet(ModelViewSet):
         enables an authenticated user to list all the projects he is part of.
         """
         user = request.user
-        projects = get_list_or_404(self.queryset.filter(contributor__user=user.id))
-
-        serializer = self.serializer_class(projects, many=True)
-        res = Response({'Projects': serializer.data}, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Projects: User {user.username} requested the list of projects")
+        projects_queryset = self.queryset.filter(contributor__user=user.id)
+        etag, last_modified = lib_conditional.list_validators(request, projects_queryset)
+        not_modified = lib_conditional.conditional_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        projects = self.paginate_queryset(self.serializer_class.values_queryset(projects_queryset,
+                                                                               self.paginator.ordering))
+        if not projects:
+            raise Http404
+
+        projects_data = self.serializer_class.values_data(projects)
+        res = lib_conditional.set_validators(self.get_paginated_response({'Projects': projects_data}),
+                                             etag, last_modified)
+        logger.info("(Success) Projects: User %s requested the list of projects", user.username)
         return res
 
     def create(self, request, *args, **kwargs):
@@ -46,13 +67,17 @@ class ProjectModelViewSet(ModelViewSet):
         project_copy['author'] = user.id
         serializer = self.serializer_class(data=project_copy)
         serializer.is_valid(raise_exception=True)
-        project_obj = serializer.save(author=user)
-        project_creator = Contributor(user=user, project=project_obj, role='Creator')
-        project_creator.save()
+        with transaction.atomic():
+            project_obj = serializer.save(author=user)
+            project_creator = Contributor(user_id=user.id, project=project_obj, role='Creator')
+            project_creator.save()
+            lib_changes.log_change(project_obj.id, 'project', lib_changes.CREATED, project_obj.id)
+            lib_changes.log_change(project_obj.id, 'contributor', lib_changes.CREATED, project_creator.id)
         serialized_project = self.serializer_class(project_obj)
         res = Response(serialized_project.data, status=status.HTTP_201_CREATED)
-        logger.info(f"(Success) Projects: User {user.username} created "
-                    f"the project #{project_obj.id}")
+        logger.info("(Success) Projects: User %s created "
+                    "the project #%s",
+                    user.username, project_obj.id)
         return res
 
     def retrieve(self, request, **kwargs):
@@ -61,12 +86,15 @@ class ProjectModelViewSet(ModelViewSet):
         """
         project_id = kwargs['id_project']
         project = get_object_or_404(self.queryset.filter(contributor__user=request.user.id, id=project_id))
+        validators = lib_conditional.object_validators(project)
+        not_modified = lib_conditional.conditional_response(request, *validators)
+        if not_modified:
+            return not_modified
         serializer = self.serializer_class(project)
-        logger.info(f"(Success) Projects: User {request.user.username} "
-                    f"requested project #{project.id}")
-        res = Response(serializer.data, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Projects: User {request.user.username} "
-                    f"requested project #{project.id}")
+        res = lib_conditional.set_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
+        logger.info("(Success) Projects: User %s "
+                    "requested project #%s",
+                    request.user.username, project.id)
         return res
 
     def update(self, request, **kwargs):
@@ -76,6 +104,9 @@ class ProjectModelViewSet(ModelViewSet):
         project_id = kwargs['id_project']
         project = lib_projects.find_obj_by_id(Project, project_id)
         self.check_object_permissions(request, project)
+        precondition_failed = lib_conditional.conditional_response(request, *lib_conditional.object_validators(project))
+        if precondition_failed:
+            return precondition_failed
         uneditable_fields = {}
         if 'author' in request.data.keys():
             uneditable_fields['author'] = request.data['author']
@@ -89,9 +120,11 @@ class ProjectModelViewSet(ModelViewSet):
         else:
             project_obj = serializer.update(project, serializer.validated_data)
             serialized_project = self.serializer_class(project_obj)
-            res = Response(serialized_project.data, status=status.HTTP_204_NO_CONTENT)
-            logger.info(f"(Success) Projects: User {project.author.username} updated "
-                        f"project #{project.id}")
+            res = lib_conditional.set_validators(Response(serialized_project.data, status=status.HTTP_204_NO_CONTENT),
+                                                 *lib_conditional.object_validators(project_obj))
+            logger.info("(Success) Projects: User %s updated "
+                        "project #%s",
+                        request.user.username, project.id)
             return res
 
     def destroy(self, request, **kwargs):
@@ -101,20 +134,26 @@ class ProjectModelViewSet(ModelViewSet):
         project_id = kwargs['id_project']
         project = lib_projects.find_obj_by_id(Project, project_id)
         self.check_object_permissions(request, project)
-        project.delete()
+        precondition_failed = lib_conditional.conditional_response(request, *lib_conditional.object_validators(project))
+        if precondition_failed:
+            return precondition_failed
+        lib_projects.delete_project(project)
         serializer = self.serializer_class(project)
         res = Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
-        logger.info(f"(Success) Projects: User {project.author.username} deleted "
-                    f"project #{project.id}")
+        logger.info("(Success) Projects: User %s deleted "
+                    "project #%s",
+                    request.user.username, project_id)
         return res
 
 
-class ContributorModelViewSet(ModelViewSet):
+class ContributorModelViewSet(ReadReplicaViewMixin, ModelViewSet):
     """
     End point for contributors
     """
     permission_classes = (ContributorPermissions,)
+    throttle_scope = 'projects'
     serializer_class = ContributorSerializer
+    pagination_class = ContributorCursorPagination
     queryset = Contributor.objects.all()
 
     def list(self, request, **kwargs):
@@ -122,12 +161,14 @@ class ContributorModelViewSet(ModelViewSet):
         List all contributors of a given project
         """
         project_id = kwargs['id_project']
-        lib_projects.find_obj_by_id(Project, project_id)
-        contributors = get_list_or_404(self.queryset.filter(project_id=project_id))
-        serializer = self.serializer_class(contributors, many=True)
-        res = Response({'contributors': serializer.data}, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Contributors: User {request.user.username} requested the list of contributors for "
-                    f"project #{project_id}")
+        contributors = self.paginate_queryset(self.serializer_class.values_queryset(
+            self.queryset.filter(project_id=project_id), self.paginator.ordering))
+        if not contributors:
+            raise Http404
+        res = self.get_paginated_response({'contributors': self.serializer_class.values_data(contributors)})
+        logger.info("(Success) Contributors: User %s requested the list of contributors for "
+                    "project #%s",
+                    request.user.username, project_id)
         return res
 
     def create(self, request, **kwargs):
@@ -146,9 +187,39 @@ class ContributorModelViewSet(ModelViewSet):
         contributor_obj = serializer.save(project)
         serialized_contributor = self.serializer_class(contributor_obj)
         res = Response(serialized_contributor.data, status=status.HTTP_201_CREATED)
-        logger.info(f"(Success) Contributors: User {request.user.username} added user {contributor_obj.user.username} "
-                    f" to the list of contributors "
-                    f"for project #{contributor_obj.project.id}: {contributor_obj.project.title}")
+        logger.info("(Success) Contributors: User %s added user %s "
+                    " to the list of contributors "
+                    "for project #%s: %s",
+                    request.user.username, contributor_obj.user.username,
+                    contributor_obj.project_id, contributor_obj.project.title)
+        return res
+
+    def create_many(self, request, **kwargs):
+        """
+        Adds a list of contributors to a given project at once, or none of them if any is invalid
+        """
+        project_id = kwargs['id_project']
+        project = lib_projects.find_obj_by_id(Project, project_id)
+        self.check_object_permissions(request, project)
+        serializer = ContributorBulkSerializer(data=request.data, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+        candidates = [(contributor['user'], contributor['role']) for contributor in serializer.validated_data]
+
+        errors = lib_projects.contributors_errors(project.id, candidates)
+        existing_user_ids = lib_projects.find_existing_user_ids([user_id for user_id, _ in candidates])
+        for (user_id, _), contributor_errors in zip(candidates, errors):
+            if user_id not in existing_user_ids:
+                contributor_errors['user'] = f'User #{user_id} does not exist'
+        if any(errors):
+            return Response({'errors': {index: contributor_errors for index, contributor_errors in enumerate(errors)
+                                        if contributor_errors}},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        contributors = lib_projects.add_contributors(project, candidates)
+        serializer = self.serializer_class(contributors, many=True)
+        res = Response({'contributors': serializer.data}, status=status.HTTP_201_CREATED)
+        logger.info("(Success) Contributors: User %s added %s contributors to project #%s",
+                    request.user.username, len(contributors), project.id)
         return res
 
     def retrieve(self, request, **kwargs):
@@ -158,9 +229,10 @@ class ContributorModelViewSet(ModelViewSet):
         contributor = lib_projects.find_contributor(self.queryset, kwargs)
         serializer = self.serializer_class(contributor)
         res = Response(serializer.data, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Contributors: User {request.user.username} "
-                    f"requested Contributor {contributor.user.username} "
-                    f"of project #{contributor.project.id}")
+        logger.info("(Success) Contributors: User %s "
+                    "requested Contributor %s "
+                    "of project #%s",
+                    request.user.username, contributor.user.username, contributor.project_id)
         return res
 
     def update(self, request, **kwargs):
@@ -181,8 +253,9 @@ class ContributorModelViewSet(ModelViewSet):
             contributor_obj = serializer.update(contributor, serializer.validated_data)
             serialized_contributor = self.serializer_class(contributor_obj)
             res = Response(serialized_contributor.data, status=status.HTTP_204_NO_CONTENT)
-            logger.info(f"(Success) Contributors: User {request.user.username} updated {contributor.user.username}'s "
-                        f"role in project #{contributor.project.id}")
+            logger.info("(Success) Contributors: User %s updated %s's "
+                        "role in project #%s",
+                        request.user.username, contributor.user.username, contributor.project_id)
             return res
 
     def destroy(self, request, **kwargs):
@@ -194,33 +267,86 @@ class ContributorModelViewSet(ModelViewSet):
         if contributor.role == 'Creator':
             return Response("Project Creator cannot be removed from project", status=status.HTTP_400_BAD_REQUEST)
         else:
-            contributor.delete()
+            contributor_id = contributor.id
+            with transaction.atomic():
+                contributor.delete()
+                lib_changes.log_change(contributor.project_id, 'contributor', lib_changes.DELETED, contributor_id)
             serializer = self.serializer_class(contributor)
             res = Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
-            logger.info(f"(Success) Contributors: User {request.user.username} "
-                        f"removed user {contributor.user.username} from "
-                        f"project #{contributor.project.id}")
+            logger.info("(Success) Contributors: User %s "
+                        "removed user %s from "
+                        "project #%s",
+                        request.user.username, contributor.user.username, contributor.project_id)
             return res
 
 
-class IssueModelViewSet(ModelViewSet):
+class IssueModelViewSet(ReadReplicaViewMixin, ModelViewSet):
     """
     End point for issues
     """
     permission_classes = (IssuePermissions,)
+    throttle_scope = 'projects'
     serializer_class = IssueSerializer
+    pagination_class = KeysetCursorPagination
+    bulk_parser_classes = api_settings.DEFAULT_PARSER_CLASSES + [NDJSONParser]
+    export_renderer_classes = (NDJSONRenderer, CSVRenderer)
     queryset = Issue.objects.all()
 
+    def get_parsers(self):
+        # called before self.action is set, which is read from the action map the same way
+        if self.action_map.get(self.request.method.lower()) == 'create_many':
+            return [parser() for parser in self.bulk_parser_classes]
+        return super().get_parsers()
+
+    def permission_denied(self, request, message=None, code=None):
+        # the contributors of a deleted project are deleted with it: its feed tells when it was deleted instead
+        if self.action == 'changes' and request.user.is_authenticated:
+            deleted_seq = lib_changes.deletion_sequence(self.kwargs['id_project'])
+            if deleted_seq is not None:
+                raise ProjectDeleted(self.kwargs['id_project'], deleted_seq)
+        super().permission_denied(request, message, code)
+
+    def get_renderers(self):
+        if self.action == 'export':
+            return [renderer() for renderer in self.export_renderer_classes]
+        return super().get_renderers()
+
     def list(self, request, **kwargs):
         """
         Lists all issue of a given project
         """
         project_id = kwargs['id_project']
-        issues = get_list_or_404(self.queryset.filter(project=project_id))
-        serializer = self.serializer_class(issues, many=True)
-        res = Response({'issues': serializer.data}, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Issues: User {request.user.username} requested the list of issues for "
-                    f"project #{project_id}")
+        query_serializer = IssueListQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        filters = dict(query_serializer.validated_data)
+        expand = filters.pop('expand')
+        self.paginator.ordering = lib_projects.ISSUE_ORDERINGS[filters.pop('ordering', 'created_time')]
+        issues_queryset = lib_projects.filter_issues(self.queryset.filter(project=project_id), filters)
+        # the validators only follow the issues themselves, not the objects embedded in them
+        etag, last_modified = (lib_conditional.project_list_validators(request, project_id, issues_queryset)
+                               if not expand else (None, None))
+        not_modified = lib_conditional.conditional_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        # like the validators, the cache generation only follows the issues, not the objects embedded in them
+        cache_key = lib_response_cache.page_cache_key(request, project_id, 'issues') if not expand else None
+        res = lib_response_cache.find_page(request, cache_key)
+        if res is None:
+            if expand:
+                issues = self.paginate_queryset(lib_projects.expand_issues(issues_queryset, expand))
+            else:
+                issues = self.paginate_queryset(self.serializer_class.values_queryset(issues_queryset,
+                                                                                      self.paginator.ordering))
+            if not issues:
+                raise Http404
+            issues_data = (self.serializer_class(issues, many=True, context={'expand': expand}).data if expand
+                           else self.serializer_class.values_data(issues))
+            res = lib_response_cache.store_page(request, cache_key,
+                                                self.get_paginated_response({'issues': issues_data}))
+        lib_conditional.set_validators(res, etag, last_modified)
+        logger.info("(Success) Issues: User %s requested the list of issues for "
+                    "project #%s",
+                    request.user.username, project_id)
         return res
 
     def create(self, request, **kwargs):
@@ -238,21 +364,136 @@ class IssueModelViewSet(ModelViewSet):
         issue_obj = serializer.save(user, project)
         serialized_issue = self.serializer_class(issue_obj)
         res = Response(serialized_issue.data, status=status.HTTP_201_CREATED)
-        logger.info(f"(Success) Issues: User {user.username} "
-                    f"created the issue #{issue_obj.id} "
-                    f"in project #{issue_obj.project.id}")
+        logger.info("(Success) Issues: User %s "
+                    "created the issue #%s "
+                    "in project #%s",
+                    user.username, issue_obj.id, issue_obj.project_id)
+        return res
+
+    def create_many(self, request, **kwargs):
+        """
+        Imports a list of issues (JSON array or NDJSON) into a given project,
+        or none of them if any is invalid
+        """
+        project_id = kwargs['id_project']
+        project = lib_projects.find_obj_by_id(Project, project_id)
+        serializer = IssueBulkSerializer(data=request.data, many=True, allow_empty=False)
+        serializer.is_valid(raise_exception=True)
+
+        assignee_ids = {issue.get('assignee') for issue in serializer.validated_data} - {None}
+        existing_user_ids = lib_projects.find_existing_user_ids(assignee_ids) | {None}
+        errors = {index: {'assignee': f"User #{issue['assignee']} does not exist"}
+                  for index, issue in enumerate(serializer.validated_data)
+                  if issue.get('assignee') not in existing_user_ids}
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = lib_projects.create_issues(project, request.user.id, serializer.validated_data)
+        res = Response({'created': created}, status=status.HTTP_201_CREATED)
+        logger.info("(Success) Issues: User %s imported %s issues in project #%s",
+                    request.user.username, created, project.id)
+        return res
+
+    def update_many(self, request, **kwargs):
+        """
+        Applies the same status/priority/assignee changes to the issues of the user matching a filter
+        """
+        project_id = kwargs['id_project']
+        serializer = IssueBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data.get('filter', {})
+        changes = serializer.validated_data['changes']
+        if changes.get('assignee') is not None \
+                and changes['assignee'] not in lib_projects.find_existing_user_ids([changes['assignee']]):
+            return Response({'errors': {'assignee': f"User #{changes['assignee']} does not exist"}},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        issue_ids = lib_projects.update_issues(project_id, request.user.id, filters, changes)
+        errors = {issue_id: 'Issue not found in the project or not authored by the user'
+                  for issue_id in filters.get('ids', []) if issue_id not in set(issue_ids)}
+        res = Response({'updated': issue_ids, 'errors': errors}, status=status.HTTP_200_OK)
+        logger.info("(Success) Issues: User %s updated %s issues in project #%s",
+                    request.user.username, len(issue_ids), project_id)
+        return res
+
+    def search(self, request, **kwargs):
+        """
+        Full-text search over the issues and comments of a given project, best matches first
+        """
+        project_id = kwargs['id_project']
+        query_serializer = SearchQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        results = lib_search.search_project(project_id, query_serializer.validated_data['q'],
+                                            query_serializer.validated_data['page_size'])
+        res = Response({'results': results}, status=status.HTTP_200_OK)
+        logger.info("(Success) Issues: User %s searched project #%s (%s results)",
+                    request.user.username, project_id, len(results))
+        return res
+
+    def export(self, request, **kwargs):
+        """
+        Streams all the issues of a given project with their comments, as NDJSON (default) or CSV (?format=csv)
+        """
+        project_id = kwargs['id_project']
+        export_format = request.accepted_renderer.format
+        issues = lib_export.project_issues(project_id)
+        lines = lib_export.csv_lines(issues) if export_format == 'csv' else lib_export.ndjson_lines(issues)
+        res = StreamingHttpResponse(lines, content_type=request.accepted_renderer.media_type)
+        res['Content-Disposition'] = f'attachment; filename="project-{project_id}-issues.{export_format}"'
+        logger.info("(Success) Issues: User %s exported the issues of project #%s as %s",
+                    request.user.username, project_id, export_format)
+        return res
+
+    def changes(self, request, **kwargs):
+        """
+        What changed in a given project since the client's last sequence number, oldest first,
+        with the current representation of the created and updated objects
+        """
+        project_id = kwargs['id_project']
+        query_serializer = ChangesQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        since = query_serializer.validated_data['since']
+        if lib_changes.is_compacted(since):
+            return Response({'detail': f'Changes after #{since} were compacted, the project must be listed again',
+                             'last_seq': lib_changes.last_sequence()},
+                            status=status.HTTP_410_GONE)
+        changes, last_seq, has_more = lib_changes.project_changes(project_id, since,
+                                                                  query_serializer.validated_data['page_size'])
+        changes = lib_changes.embed_data(changes, {'project': ProjectSerializer, 'contributor': ContributorSerializer,
+                                                   'issue': IssueSerializer, 'comment': CommentSerializer})
+        res = Response({'changes': changes, 'last_seq': last_seq, 'has_more': has_more}, status=status.HTTP_200_OK)
+        logger.info("(Success) Issues: User %s requested the changes of project #%s since #%s (%s changes)",
+                    request.user.username, project_id, since, len(changes))
+        return res
+
+    def stats(self, request, **kwargs):
+        """
+        Counts of the issues and contributors of a given project, for its dashboard
+        """
+        project_id = kwargs['id_project']
+        res = Response(lib_stats.project_stats(project_id), status=status.HTTP_200_OK)
+        logger.info("(Success) Issues: User %s requested the stats of project #%s",
+                    request.user.username, project_id)
         return res
 
     def retrieve(self, request, **kwargs):
         """
         Returns a specific issue by ID
         """
-        issue = lib_projects.find_issue(self.queryset, kwargs)
-        serializer = self.serializer_class(issue)
-        res = Response(serializer.data, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Issues: User {request.user.username} "
-                    f"requested issue #{issue.id} "
-                    f"of project #{issue.project.id}")
+        query_serializer = IssueExpandQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        expand = query_serializer.validated_data['expand']
+        issue = lib_projects.find_issue(lib_projects.expand_issues(self.queryset, expand), kwargs)
+        validators = lib_conditional.object_validators(issue) if not expand else (None, None)
+        not_modified = lib_conditional.conditional_response(request, *validators)
+        if not_modified:
+            return not_modified
+        serializer = self.serializer_class(issue, context={'expand': expand})
+        res = lib_conditional.set_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
+        logger.info("(Success) Issues: User %s "
+                    "requested issue #%s "
+                    "of project #%s",
+                    request.user.username, issue.id, issue.project_id)
         return res
 
     def update(self, request, **kwargs):
@@ -261,6 +502,9 @@ class IssueModelViewSet(ModelViewSet):
         """
         issue = lib_projects.find_issue(self.queryset, kwargs)
         self.check_object_permissions(request, issue)
+        precondition_failed = lib_conditional.conditional_response(request, *lib_conditional.object_validators(issue))
+        if precondition_failed:
+            return precondition_failed
         uneditable_fields = {}
         if 'project' in request.data.keys():
             uneditable_fields['project'] = request.data['project']
@@ -274,9 +518,11 @@ class IssueModelViewSet(ModelViewSet):
         else:
             issue_obj = serializer.update(issue, serializer.validated_data)
             serialized_issue = self.serializer_class(issue_obj)
-            res = Response(serialized_issue.data, status=status.HTTP_204_NO_CONTENT)
-            logger.info(f"(Success) Issues: User {request.user.username} updated issue #{issue.id} "
-                        f" of project #{issue.project.id}")
+            res = lib_conditional.set_validators(Response(serialized_issue.data, status=status.HTTP_204_NO_CONTENT),
+                                                 *lib_conditional.object_validators(issue_obj))
+            logger.info("(Success) Issues: User %s updated issue #%s "
+                        " of project #%s",
+                        request.user.username, issue.id, issue.project_id)
             return res
 
     def destroy(self, request, **kwargs):
@@ -285,34 +531,66 @@ class IssueModelViewSet(ModelViewSet):
         """
         issue = lib_projects.find_issue(self.queryset, kwargs)
         self.check_object_permissions(request, issue)
-        issue.delete()
+        precondition_failed = lib_conditional.conditional_response(request, *lib_conditional.object_validators(issue))
+        if precondition_failed:
+            return precondition_failed
+        with transaction.atomic():
+            issue.delete()
+            lib_counters.count_issues(issue.project_id, -1, -lib_counters.is_open(issue.status))
+            # its comments go with it, the client drops them as well
+            lib_changes.log_change(issue.project_id, 'issue', lib_changes.DELETED, kwargs['id_issue'])
         serializer = self.serializer_class(issue)
         res = Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
-        logger.info(f"(Success) Issues: User {request.user.username} "
-                    f"deleted issue #{issue.id}: {issue.title} in "
-                    f"project #{issue.project.id}")
+        logger.info("(Success) Issues: User %s "
+                    "deleted issue #%s: %s in "
+                    "project #%s",
+                    request.user.username, kwargs['id_issue'], issue.title, issue.project_id)
         return res
 
 
-class CommentModelViewSet(ModelViewSet):
+class CommentModelViewSet(ReadReplicaViewMixin, ModelViewSet):
     """
     End point for comments
     """
     permission_classes = (CommentPermissions,)
+    throttle_scope = 'projects'
     serializer_class = CommentSerializer
+    pagination_class = KeysetCursorPagination
     queryset = Comment.objects.all()
 
     def list(self, request, **kwargs):
         """
         Lists all comments on a project related issue
         """
+        query_serializer = CommentExpandQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        expand = query_serializer.validated_data['expand']
         issue = lib_projects.find_issue(IssueModelViewSet.queryset, kwargs)
-        comments = get_list_or_404(self.queryset.filter(issue=issue))
-        serializer = self.serializer_class(comments, many=True)
-        res = Response({'comments': serializer.data}, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Comments: User {request.user.username} requested the list of comments for "
-                    f"Issue #{issue.id} of "
-                    f"project #{issue.project.id}")
+        comments_queryset = self.queryset.filter(issue=issue)
+        etag, last_modified = (lib_conditional.project_list_validators(request, issue.project_id, comments_queryset)
+                               if not expand else (None, None))
+        not_modified = lib_conditional.conditional_response(request, etag, last_modified)
+        if not_modified:
+            return not_modified
+        cache_key = lib_response_cache.page_cache_key(request, issue.project_id, 'comments') if not expand else None
+        res = lib_response_cache.find_page(request, cache_key)
+        if res is None:
+            if expand:
+                comments = self.paginate_queryset(lib_projects.expand_comments(comments_queryset, expand))
+            else:
+                comments = self.paginate_queryset(self.serializer_class.values_queryset(comments_queryset,
+                                                                                        self.paginator.ordering))
+            if not comments:
+                raise Http404
+            comments_data = (self.serializer_class(comments, many=True, context={'expand': expand}).data if expand
+                             else self.serializer_class.values_data(comments))
+            res = lib_response_cache.store_page(request, cache_key,
+                                                self.get_paginated_response({'comments': comments_data}))
+        lib_conditional.set_validators(res, etag, last_modified)
+        logger.info("(Success) Comments: User %s requested the list of comments for "
+                    "Issue #%s of "
+                    "project #%s",
+                    request.user.username, issue.id, issue.project_id)
         return res
 
     def create(self, request, **kwargs):
@@ -329,23 +607,32 @@ class CommentModelViewSet(ModelViewSet):
         comment_obj = serializer.save(user, issue)
         serialized_comment = self.serializer_class(comment_obj)
         res = Response(serialized_comment.data, status=status.HTTP_201_CREATED)
-        logger.info(f"(Success) Comments: User {user.username} "
-                    f"created the comment #{comment_obj.id} "
-                    f"on issue #{comment_obj.issue.id} "
-                    f"in project #{comment_obj.issue.project.id}")
+        logger.info("(Success) Comments: User %s "
+                    "created the comment #%s "
+                    "on issue #%s "
+                    "in project #%s",
+                    user.username, comment_obj.id, comment_obj.issue_id, comment_obj.issue.project_id)
         return res
 
     def retrieve(self, request, **kwargs):
         """
         Returns a specific Comment on a issue by ID
         """
-        comment = lib_projects.find_comment(self.queryset, kwargs)
-        serializer = self.serializer_class(comment)
-        res = Response(serializer.data, status=status.HTTP_200_OK)
-        logger.info(f"(Success) Comments: User {request.user.username} "
-                    f"requested comment #{comment.id} "
-                    f"of issue #{comment.issue.id} "
-                    f"on project #{comment.issue.project.id}")
+        query_serializer = CommentExpandQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        expand = query_serializer.validated_data['expand']
+        comment = lib_projects.find_comment(self.queryset, kwargs, expand)
+        validators = lib_conditional.object_validators(comment) if not expand else (None, None)
+        not_modified = lib_conditional.conditional_response(request, *validators)
+        if not_modified:
+            return not_modified
+        serializer = self.serializer_class(comment, context={'expand': expand})
+        res = lib_conditional.set_validators(Response(serializer.data, status=status.HTTP_200_OK), *validators)
+        logger.info("(Success) Comments: User %s "
+                    "requested comment #%s "
+                    "of issue #%s "
+                    "on project #%s",
+                    request.user.username, comment.id, comment.issue_id, comment.issue.project_id)
         return res
 
     def update(self, request, **kwargs):
@@ -354,6 +641,9 @@ class CommentModelViewSet(ModelViewSet):
         """
         comment = lib_projects.find_comment(self.queryset, kwargs)
         self.check_object_permissions(request, comment)
+        precondition_failed = lib_conditional.conditional_response(request, *lib_conditional.object_validators(comment))
+        if precondition_failed:
+            return precondition_failed
         uneditable_fields = {}
         if 'issue' in request.data.keys():
             uneditable_fields['issue'] = request.data['issue']
@@ -367,11 +657,13 @@ class CommentModelViewSet(ModelViewSet):
         else:
             comment_obj = serializer.update(comment, serializer.validated_data)
             serialized_comment = self.serializer_class(comment_obj)
-            res = Response(serialized_comment.data, status=status.HTTP_204_NO_CONTENT)
-            logger.info(f"(Success) Comments: User {request.user.username} "
-                        f"updated comment #{comment.id} "
-                        f"of issue #{comment.issue.id} "
-                        f"on project #{comment.issue.project.id}")
+            res = lib_conditional.set_validators(Response(serialized_comment.data, status=status.HTTP_204_NO_CONTENT),
+                                                 *lib_conditional.object_validators(comment_obj))
+            logger.info("(Success) Comments: User %s "
+                        "updated comment #%s "
+                        "of issue #%s "
+                        "on project #%s",
+                        request.user.username, comment.id, comment.issue_id, comment.issue.project_id)
             return res
 
     def destroy(self, request, **kwargs):
@@ -380,11 +672,20 @@ class CommentModelViewSet(ModelViewSet):
         """
         comment = lib_projects.find_comment(self.queryset, kwargs)
         self.check_object_permissions(request, comment)
-        comment.delete()
+        precondition_failed = lib_conditional.conditional_response(request, *lib_conditional.object_validators(comment))
+        if precondition_failed:
+            return precondition_failed
+        with transaction.atomic():
+            comment.delete()
+            lib_counters.count_comments(comment.issue.project_id, comment.issue_id, -1)
+            lib_changes.log_change(comment.issue.project_id, 'comment', lib_changes.DELETED, kwargs['id_comment'],
+                                   comment.issue_id)
+            lib_response_cache.bump_project_generation_on_commit(comment.issue.project_id)
         serializer = self.serializer_class(comment)
         res = Response(serializer.data, status=status.HTTP_204_NO_CONTENT)
-        logger.info(f"(Success) Comments: User {request.user.username} "
-                    f"deleted comment #{comment.id} of "
-                    f"issue #{comment.issue.id} "
-                    f"(project #{comment.issue.project.id}")
+        logger.info("(Success) Comments: User %s "
+                    "deleted comment #%s of "
+                    "issue #%s "
+                    "(project #%s",
+                    request.user.username, kwargs['id_comment'], comment.issue_id, comment.issue.project_id)
         return res
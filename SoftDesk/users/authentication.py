@@ -0,0 +1,82 @@
+"""
+Authentication classes of the users app
+"""
+import threading
+import time
+
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication, jwt_get_username_from_payload
+
+from SoftDesk import settings
+from users.models import CustomUser
+
+_cached_users = {}
+_cached_users_lock = threading.Lock()
+
+
+def find_cached_user(user_id: int) -> CustomUser:
+    """
+    Returns the full user from a short-lived in-process cache, or from the database
+    """
+    now = time.monotonic()
+    cached = _cached_users.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    user = CustomUser.objects.get(pk=user_id)
+    with _cached_users_lock:
+        if len(_cached_users) >= settings.JWT_USER_CACHE_SIZE:
+            for expired_id in [key for key, (expires, _) in _cached_users.items() if expires <= now]:
+                del _cached_users[expired_id]
+            if len(_cached_users) >= settings.JWT_USER_CACHE_SIZE:
+                _cached_users.clear()
+        _cached_users[user_id] = (now + settings.JWT_USER_CACHE_TTL, user)
+    return user
+
+
+class TokenUser:
+    """
+    Authenticated user built from the verified claims of a token:
+    id and username are read from the token,
+    accessing any other attribute loads the full CustomUser.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id: int, username: str):
+        self.id = self.pk = user_id
+        self.username = username
+
+    def __getattr__(self, name):
+        # only called for the attributes that are not set on the token user itself
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get_user(), name)
+
+    def get_user(self) -> CustomUser:
+        if '_user' not in self.__dict__:
+            self._user = find_cached_user(self.id)
+        return self._user
+
+    def __eq__(self, other):
+        return isinstance(other, (TokenUser, CustomUser)) and self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return self.username
+
+
+class StatelessJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """
+    Same as JSONWebTokenAuthentication without loading the user from the database on every request.
+    As the user is not read, deactivating an account only takes effect when its tokens expire.
+    """
+    def authenticate_credentials(self, payload):
+        username = jwt_get_username_from_payload(payload)
+        user_id = payload.get('user_id')
+        if not username or not isinstance(user_id, int):
+            raise exceptions.AuthenticationFailed(_('Invalid payload.'))
+        return TokenUser(user_id, username)
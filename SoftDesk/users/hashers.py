@@ -0,0 +1,14 @@
+"""
+Password hashers of the users app
+"""
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from SoftDesk import settings
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose work factor is set by PASSWORD_HASHER_ITERATIONS.
+    Passwords hashed with another iteration count are rehashed at the user's next login.
+    """
+    iterations = settings.PASSWORD_HASHER_ITERATIONS
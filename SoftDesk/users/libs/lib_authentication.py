@@ -0,0 +1,79 @@
+"""
+Functions lib for the login of users app
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.http import Http404
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from SoftDesk import settings
+from users.models import CustomUser
+
+_verify_pool = ThreadPoolExecutor(max_workers=settings.LOGIN_VERIFY_WORKERS, thread_name_prefix='password-verify')
+_verify_slots = threading.BoundedSemaphore(settings.LOGIN_VERIFY_WORKERS)
+
+
+class LoginBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, please try again later.'
+    default_code = 'login_busy'
+
+
+def unknown_username_cache_key(username: str) -> str:
+    return f"login:unknown:{hashlib.sha256(username.encode()).hexdigest()}"
+
+
+def find_user(username: str) -> CustomUser:
+    """
+    Returns the user with the given username.
+    Unknown usernames are remembered for a while, so that repeated attempts skip the database.
+    """
+    key = unknown_username_cache_key(username)
+    if cache.get(key):
+        raise Http404
+    user = CustomUser.objects.filter(username=username).first()
+    if user is None:
+        cache.set(key, True, settings.LOGIN_UNKNOWN_USERNAME_TIMEOUT)
+        raise Http404
+    return user
+
+
+def forget_unknown_username(username: str) -> None:
+    cache.delete(unknown_username_cache_key(username))
+
+
+def verify_password(user: CustomUser, password: str) -> bool:
+    """
+    Checks the password in the bounded pool of verify workers,
+    waiting at most LOGIN_VERIFY_TIMEOUT seconds for a free one.
+    The password is rehashed if the hasher settings changed since it was set.
+    """
+    if not _verify_slots.acquire(timeout=settings.LOGIN_VERIFY_TIMEOUT):
+        raise LoginBusy()
+    try:
+        is_valid, new_encoded = _verify_pool.submit(_check_password, password, user.password).result()
+    finally:
+        _verify_slots.release()
+
+    if new_encoded:
+        user.password = new_encoded
+        user.save(update_fields=['password'])
+    return is_valid
+
+
+def _check_password(password: str, encoded: str) -> tuple[bool, str]:
+    """
+    Runs in a verify worker: returns whether the password matches and its new hash if it must be rehashed
+    """
+    rehashed = []
+
+    def rehash(raw_password):
+        rehashed.append(make_password(raw_password))
+
+    is_valid = check_password(password, encoded, setter=rehash)
+    return is_valid, rehashed[0] if rehashed else ''
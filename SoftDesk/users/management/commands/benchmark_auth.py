@@ -0,0 +1,44 @@
+"""
+Measures the authentication overhead per request of the token authentication classes
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from rest_framework_jwt.serializers import jwt_encode_handler, jwt_payload_handler
+
+from SoftDesk import benchmarks
+from users.authentication import StatelessJSONWebTokenAuthentication, _cached_users
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ('Authenticates the same token request with JSONWebTokenAuthentication and with '
+            'StatelessJSONWebTokenAuthentication, and shows the time and queries per request')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5000, help='requests per case (default 5000)')
+
+    def handle(self, *args, **options):
+        with benchmarks.rolled_back():
+            user = CustomUser.objects.create(username='benchmark-auth', password='!', first_name='bench',
+                                             last_name='mark', email='benchmark-auth@softdesk.io')
+            request = APIRequestFactory().get(
+                '/my_infos/', HTTP_AUTHORIZATION=f'Bearer {jwt_encode_handler(jwt_payload_handler(user))}')
+            _cached_users.pop(user.id, None)
+            cases = {
+                'JSONWebTokenAuthentication': lambda: JSONWebTokenAuthentication().authenticate(request)[0].id,
+                'StatelessJSONWebTokenAuthentication': (
+                    lambda: StatelessJSONWebTokenAuthentication().authenticate(request)[0].id),
+                # another field than the claims, the user is loaded then cached for JWT_USER_CACHE_TTL
+                'StatelessJSONWebTokenAuthentication, user.email': (
+                    lambda: StatelessJSONWebTokenAuthentication().authenticate(request)[0].email),
+            }
+            for name, authenticate in cases.items():
+                with CaptureQueriesContext(connection) as queries:
+                    timing = benchmarks.timings(authenticate, options['repeat'])
+                self.stdout.write(f"{name}: median {timing['median_ms'] * 1000:.1f} µs, "
+                                  f"p95 {timing['p95_ms'] * 1000:.1f} µs, "
+                                  f"{len(queries)} queries for {options['repeat']} requests")
+            _cached_users.pop(user.id, None)
@@ -0,0 +1,76 @@
+"""
+Load test of the login endpoint: logins per second, and per core
+"""
+import os
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from SoftDesk import settings
+from users.libs import lib_authentication
+from users.models import CustomUser
+from users.views import AuthenticationAPIView
+
+USERNAME, PASSWORD = 'benchmark-login', 'benchmark-pw-1234'
+
+
+class Command(BaseCommand):
+    help = ('Logs in through the login view from concurrent threads, with a valid password, a wrong one '
+            'and an unknown username, and reports the logins per second and per core. '
+            'The throttles and the unknown usernames use an in-memory cache, the shared one is left untouched.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=100, help='logins per case (default 100)')
+        parser.add_argument('--threads', type=int, default=settings.LOGIN_VERIFY_WORKERS,
+                            help=f'concurrent clients (default LOGIN_VERIFY_WORKERS, {settings.LOGIN_VERIFY_WORKERS})')
+
+    def handle(self, *args, **options):
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+        cases = {
+            'valid password': (USERNAME, PASSWORD),
+            'wrong password': (USERNAME, 'wrong'),
+            'unknown username': (f'{USERNAME}-unknown', PASSWORD),
+        }
+        self.stdout.write(f"{options['logins']} logins per case from {options['threads']} threads, {cores} cores, "
+                          f"PBKDF2 with {settings.PASSWORD_HASHER_ITERATIONS} iterations")
+        user = CustomUser.objects.create_user(USERNAME, f'{USERNAME}@softdesk.io', PASSWORD,
+                                              first_name='bench', last_name='mark')
+        try:
+            with override_settings(CACHES={'default': {
+                    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-logins'}}):
+                for name, (username, password) in cases.items():
+                    duration, statuses = self.login(username, password, options['logins'], options['threads'])
+                    rate = options['logins'] / duration
+                    self.stdout.write(f"{name}: {rate:.1f} logins/s, {rate / min(cores, options['threads']):.1f} "
+                                      f"logins/s per core, statuses {dict(statuses)}")
+        finally:
+            user.delete()
+
+    @staticmethod
+    def login(username: str, password: str, logins: int, threads: int) -> tuple[float, Counter]:
+        view, factory, statuses, statuses_lock = AuthenticationAPIView.as_view(), APIRequestFactory(), Counter(), \
+            threading.Lock()
+        lib_authentication.forget_unknown_username(username)
+
+        def client(thread_index: int):
+            for index in range(thread_index, logins, threads):
+                # one client address per login, under the rate limit of the login
+                request = factory.post('/login/', {'username': username, 'password': password}, format='json',
+                                       REMOTE_ADDR=f'198.18.{index // 256 % 256}.{index % 256}')
+                status_code = view(request).status_code
+                with statuses_lock:
+                    statuses[status_code] += 1
+            connections.close_all()
+
+        workers = [threading.Thread(target=client, args=(thread_index,)) for thread_index in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - start, statuses
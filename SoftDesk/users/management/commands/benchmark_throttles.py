@@ -0,0 +1,56 @@
+"""
+Microbenchmark of the throttle check run by every request
+"""
+import tempfile
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from SoftDesk import benchmarks
+from SoftDesk.cache_backends import LockingFileBasedCache
+from SoftDesk.throttling import SlidingWindowRateThrottle
+
+# high enough for the benchmark never to be throttled
+BENCHMARK_RATE = '100000000/day'
+
+
+class HistoryThrottle(SimpleRateThrottle):
+    """
+    DRF's algorithm, a list of the request timestamps of the day per client
+    """
+    rate = BENCHMARK_RATE
+
+    def get_cache_key(self, request, view):
+        return 'benchmark:history'
+
+
+class SlidingWindowThrottle(SlidingWindowRateThrottle):
+    rate = BENCHMARK_RATE
+
+    def get_cache_key(self, request, view):
+        return 'benchmark:sliding'
+
+
+class Command(BaseCommand):
+    help = ('Times the throttle check of one client, with the timestamp list of DRF and with the sliding window '
+            'counters of SoftDesk.throttling, on the shared file cache and in memory')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=2000, help='requests per case (default 2000)')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/projects/')
+        with tempfile.TemporaryDirectory() as cache_dir:
+            backends = {'shared file cache': LockingFileBasedCache(cache_dir, {}),
+                        'in-memory cache': LocMemCache('benchmark-throttles', {})}
+            for backend_name, cache in backends.items():
+                for throttle_class in (HistoryThrottle, SlidingWindowThrottle):
+                    throttle = throttle_class()
+                    throttle.cache = cache
+                    timing = benchmarks.timings(lambda: throttle.allow_request(request, None), options['repeat'])
+                    self.stdout.write(f"{throttle_class.__name__} on the {backend_name}: "
+                                      f"median {timing['median_ms'] * 1000:.1f} µs, "
+                                      f"p95 {timing['p95_ms'] * 1000:.1f} µs per request "
+                                      f"(over {options['repeat']} requests of the same client)")
@@ -30,10 +30,19 @@ class UserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({'password': 'Passwords must match'})
         custom_user.set_password(password)
         custom_user.save()
-        logger.info(f'New user registered : {custom_user.username}')
+        logger.info('New user registered : %s', custom_user.username)
         return custom_user
 
 
+class UserSummarySerializer(serializers.ModelSerializer):
+    """
+    Public identity of a user, embedded in the representations of the other apps
+    """
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'first_name', 'last_name']
+
+
 class UserLoginSerializer(serializers.ModelSerializer):
 
     class Meta:
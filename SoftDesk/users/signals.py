@@ -0,0 +1,16 @@
+"""
+Signal receivers of the users app
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from users.libs import lib_authentication
+from users.models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_unknown_username(sender, instance, **kwargs):
+    """
+    A username remembered as unknown by the login may have just been registered or taken
+    """
+    lib_authentication.forget_unknown_username(instance.username)
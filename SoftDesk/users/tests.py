@@ -1 +1,112 @@
-# Create your tests here.
+"""
+Tests of the users app
+"""
+import datetime
+from unittest import mock
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+from rest_framework_jwt.serializers import jwt_encode_handler, jwt_payload_handler
+
+from SoftDesk import settings
+from users.authentication import StatelessJSONWebTokenAuthentication, _cached_users
+from users.libs import lib_authentication
+from users.models import CustomUser
+
+# the throttle counters of a test must not leak into the next one
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class StatelessAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _cached_users.clear()
+        self.user = CustomUser.objects.create_user('alice', 'alice@softdesk.io', 'pw12345!',
+                                                   first_name='alice', last_name='test')
+        self.payload = jwt_payload_handler(self.user)
+
+    def authenticate(self, payload: dict):
+        request = APIRequestFactory().get('/my_infos/', HTTP_AUTHORIZATION=f'Bearer {jwt_encode_handler(payload)}')
+        return StatelessJSONWebTokenAuthentication().authenticate(request)[0]
+
+    def test_user_built_from_claims(self):
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.payload)
+            self.assertEqual((user.id, user.pk, user.username), (self.user.id, self.user.id, 'alice'))
+            self.assertTrue(user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'alice@softdesk.io')
+        with self.assertNumQueries(0):  # cached for JWT_USER_CACHE_TTL
+            self.assertEqual(self.authenticate(self.payload).last_name, 'test')
+
+    def test_invalid_tokens_refused(self):
+        expired = {**self.payload, 'exp': datetime.datetime.utcnow() - datetime.timedelta(seconds=1)}
+        without_user_id = {key: value for key, value in self.payload.items() if key != 'user_id'}
+        for payload in (expired, without_user_id):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.authenticate(payload)
+        forged = self.client.get('/my_infos/', HTTP_AUTHORIZATION=f'Bearer {jwt_encode_handler(self.payload)}x')
+        self.assertEqual(forged.status_code, 401)
+
+    def test_personal_infos_with_token(self):
+        response = self.client.get('/my_infos/', HTTP_AUTHORIZATION=f'Bearer {jwt_encode_handler(self.payload)}')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['current_user']['username'], 'alice')
+        self.assertEqual(self.client.get('/my_infos/').status_code, 401)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('alice', 'alice@softdesk.io', 'pw12345!',
+                                                   first_name='alice', last_name='test')
+
+    def login(self, username: str, password: str = 'pw12345!'):
+        return self.client.post('/login/', {'username': username, 'password': password})
+
+    def test_login(self):
+        response = self.login('alice')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['name'], 'alice test')
+        self.assertEqual(self.client.get('/my_infos/', HTTP_AUTHORIZATION=f"Bearer {response.json()['token']}")
+                         .status_code, 200)
+        self.assertEqual(self.login('alice', 'wrong').status_code, 403)
+
+    def test_unknown_username_remembered(self):
+        self.assertEqual(self.login('nobody').status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.login('nobody').status_code, 404)
+        CustomUser.objects.create_user('nobody', 'nobody@softdesk.io', 'pw12345!', first_name='no', last_name='body')
+        self.assertEqual(self.login('nobody').status_code, 200)  # registering the username forgets it
+
+    def test_password_rehashed_with_new_iterations(self):
+        hasher = get_hasher()
+        self.user.password = hasher.encode('pw12345!', hasher.salt(), iterations=1000)
+        self.user.save(update_fields=['password'])
+        self.assertEqual(self.login('alice').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(hasher.decode(self.user.password)['iterations'], settings.PASSWORD_HASHER_ITERATIONS)
+        self.assertTrue(self.user.check_password('pw12345!'))
+
+    def test_attempts_limited_per_username(self):
+        for _ in range(10):
+            self.assertEqual(self.login('mallory').status_code, 404)
+        self.assertEqual(self.login('mallory').status_code, 429)
+        self.assertEqual(self.login('alice').status_code, 200)
+
+    def test_busy_verify_workers(self):
+        slots = [lib_authentication._verify_slots.acquire(blocking=False)
+                 for _ in range(settings.LOGIN_VERIFY_WORKERS)]
+        try:
+            self.assertTrue(all(slots))
+            with mock.patch.object(settings, 'LOGIN_VERIFY_TIMEOUT', 0.01):
+                self.assertEqual(self.login('alice').status_code, 503)
+        finally:
+            for _ in slots:
+                lib_authentication._verify_slots.release()
+        self.assertEqual(self.login('alice').status_code, 200)
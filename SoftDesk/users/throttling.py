@@ -0,0 +1,20 @@
+"""
+Throttles of the users app
+"""
+import hashlib
+
+from SoftDesk.throttling import SlidingWindowRateThrottle
+
+
+class LoginRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limits the login attempts per (username, client IP)
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        username = str(request.data.get('username', ''))
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': f"{self.get_ident(request)}:{hashlib.sha256(username.encode()).hexdigest()}"
+        }
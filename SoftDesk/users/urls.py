@@ -3,6 +3,8 @@ from django.urls import path
 from users.views import CreateUserModelViewSet, AuthenticationAPIView, PersonalInfosModelViewSet
 from rest_framework_jwt.views import refresh_jwt_token
 
+from SoftDesk.async_views import asgi_view
+
 app_name = "users"
 
 urlpatterns = [
@@ -11,10 +13,10 @@ urlpatterns = [
     })),
     path('login/', AuthenticationAPIView.as_view()),
     url('token_refresh/', refresh_jwt_token),
-    path('my_infos/', PersonalInfosModelViewSet.as_view(
+    path('my_infos/', asgi_view(PersonalInfosModelViewSet.as_view(
         {
             'get': 'retrieve',
             'put': 'update',
         }
-    ))
+    )))
 ]
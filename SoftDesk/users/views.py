@@ -2,19 +2,21 @@ import jwt
 import logging
 
 from django.contrib.auth import user_logged_in
-from django.contrib.auth.hashers import check_password
 
 from rest_framework import status
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_jwt.serializers import jwt_payload_handler
 
 from SoftDesk import settings
+from users.libs import lib_authentication
 from users.models import CustomUser
 from users.serializers import UserSerializer, UserLoginSerializer
+from users.throttling import LoginRateThrottle
 
 
 logger = logging.getLogger('users_app')
@@ -25,6 +27,7 @@ class CreateUserModelViewSet(ModelViewSet):
     Endpoint to create a user
     """
     permission_classes = (AllowAny,)
+    throttle_scope = 'users'
     serializer_class = UserSerializer
 
 
@@ -33,6 +36,8 @@ class AuthenticationAPIView(APIView):
     Endpoint to Signup and get authentication Token
     """
     permission_classes = (AllowAny,)
+    throttle_scope = 'users'
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES + [LoginRateThrottle]
     serializer_class = UserLoginSerializer
 
     @staticmethod
@@ -44,15 +49,15 @@ class AuthenticationAPIView(APIView):
             username = request.data['username']
             password = request.data['password']
 
-            user = get_object_or_404(CustomUser.objects.filter(username=username))
-            if user and check_password(password, user.password):
+            user = lib_authentication.find_user(username)
+            if user and lib_authentication.verify_password(user, password):
                 try:
                     payload = jwt_payload_handler(user)
                     token = jwt.encode(payload, settings.SECRET_KEY)
                     user_details = {'name': f"{user.first_name} {user.last_name}", 'token': token}
                     user_logged_in.send(sender=user.__class__,
                                         request=request, user=user)
-                    logger.info(f'User connection for {user.username} : successful')
+                    logger.info('User connection for %s : successful', user.username)
                     return Response(user_details, status=status.HTTP_200_OK)
 
                 except Exception as e:
@@ -69,6 +74,7 @@ class AuthenticationAPIView(APIView):
 
 class PersonalInfosModelViewSet(ModelViewSet):
     permission_classes = (IsAuthenticated,)
+    throttle_scope = 'users'
     serializer_class = UserSerializer
     queryset = CustomUser.objects.all()
     """